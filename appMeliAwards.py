@@ -1,326 +1,342 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
 import textwrap
 import numpy as np
-from gspread.exceptions import APIError, WorksheetNotFound
+from calculos import (
+    TIPOS_LOGICOS,
+    adicionar_intervalos_top3,
+    base_simulacao_pesos,
+    calcular_contagem,
+    calcular_progresso,
+    calcular_top3,
+    calcular_totais,
+    comparar_pesos,
+    descrever_drift,
+    esquema_aba,
+    normalizar_tipo,
+    relatorio_memoria,
+    separador_csv,
+    tabela_exibicao,
+    versao_dados,
+)
+from planilhas import (
+    CICLO_ATUAL,
+    MODO_OFFLINE,
+    TAMANHO_PAGINA_PREVIA,
+    ErroPlanilha,
+    avaliacoes_do_usuario,
+    carregar_base,
+    ciclos_disponiveis,
+    configurar_credenciais,
+    gravar_linhas_em_lote,
+    invalidar_cache_respostas,
+    obter_respostas_tipo,
+    obter_todas_respostas,
+    salvar_resposta_ponderada,
+    salvar_respostas_em_lote,
+)
 
-# IDs das planilhas compartilhadas no Google Sheets
-PERGUNTAS_ID = "1-mlYet1m6pN510WN8V-6XEJyDovXdlQN0TLzlr0WcPY"
-ACESSOS_ID = "1p5bzFBwAOAisFZLlt3lqXjDPJG-GfL2xkkm3fxQhQRU"
-RESPOSTAS_ID = "1OKhItXlUwmYGGIVBpNIO_48Hsb5wIRZlZ6a8p_ZbheA"
 ADMIN_PASSWORD = "admin123"
 
 # Escala de notas para Comercial, Técnica e ESG
 NOTAS_COM_TEC = [1.0, 1.3, 1.5, 1.7, 2.0, 2.3, 2.5, 2.7, 3.0]
 
 # --------------------------------------------------------------------------------
-# Funções utilitárias de numérico
+# Importação em lote de avaliações (XLSX/CSV)
 # --------------------------------------------------------------------------------
-def to_number(value):
-    """Converte textos como '2,7' ou '2.7' para float 2.7; vazio -> NaN."""
-    if value is None or (isinstance(value, float) and np.isnan(value)):
-        return np.nan
-    s = str(value).strip()
-    if s == "":
-        return np.nan
-    s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return np.nan
+LINHAS_POR_BLOCO_LEITURA = 10000
 
-# --------------------------------------------------------------------------------
-# Mapeamento Tipo -> Nome da Aba na planilha de respostas
-# --------------------------------------------------------------------------------
-def mapear_tipo_para_aba(tipo: str) -> str:
+def ler_arquivo_importacao(arquivo, nome_arquivo, tipo_padrao=""):
     """
-    Converte o tipo de avaliação no nome da aba da planilha de respostas.
-    - "Comercial" -> "Comercial"
-    - "Técnica"   -> "Técnica"
-    - "ESG"       -> "Esg"  (aba já existente)
+    Lê a planilha de importação em modo streaming e devolve um DataFrame com
+    as células originais, mais as colunas "Tipo", "Origem" e "Linha" (para o
+    relatório de erros).
+    - XLSX: openpyxl em read_only; abas nomeadas como um tipo (Comercial,
+      Técnica, Esg) usam esse tipo; demais abas só entram se tiverem a
+      coluna "Tipo" (ex.: a aba "Consolidado" de Respostas.xlsx é ignorada).
+    - CSV: lido em blocos; o tipo vem da coluna "Tipo" ou de tipo_padrao.
+    Linhas com a coluna "Tipo" em branco também recebem tipo_padrao.
     """
-    tipo_norm = (tipo or "").strip()
-    if tipo_norm.lower() == "esg":
-        return "Esg"
-    return tipo_norm
+    blocos = []
+
+    def _montar_bloco(cabecalho, linhas, origem, tipo_aba, primeira_linha):
+        bloco = pd.DataFrame(linhas, columns=cabecalho, dtype=object)
+        if "Tipo" not in bloco.columns or tipo_aba:
+            bloco["Tipo"] = tipo_aba or tipo_padrao
+        elif tipo_padrao:
+            vazio = bloco["Tipo"].fillna("").astype(str).str.strip() == ""
+            bloco.loc[vazio, "Tipo"] = tipo_padrao
+        bloco["Origem"] = origem
+        bloco["Linha"] = np.arange(primeira_linha, primeira_linha + len(bloco))
+        return bloco
+
+    if nome_arquivo.lower().endswith(".csv"):
+        amostra = arquivo.read(1 << 16)
+        if isinstance(amostra, bytes):
+            amostra = amostra.decode("utf-8-sig", errors="ignore")
+        arquivo.seek(0)
+        sep = separador_csv(amostra)
+        primeira_linha = 2
+        for chunk in pd.read_csv(
+            arquivo,
+            sep=sep,
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            chunksize=LINHAS_POR_BLOCO_LEITURA,
+        ):
+            blocos.append(
+                _montar_bloco(chunk.columns, chunk.to_numpy(), nome_arquivo, "", primeira_linha)
+            )
+            primeira_linha += len(chunk)
+    else:
+        from openpyxl import load_workbook
 
-# --------------------------------------------------------------------------------
-# Conexão com Google Sheets
-# --------------------------------------------------------------------------------
-def conectar_planilha(sheet_id):
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(
-        st.secrets["gspread"], scope
-    )
-    client = gspread.authorize(creds)
-    return client.open_by_key(sheet_id)
-
-def ler_perguntas():
-    tipos = ["Comercial", "Técnica", "ESG"]
-    perguntas = {t: [] for t in tipos}
-    sheet = conectar_planilha(PERGUNTAS_ID)
-    worksheet = sheet.get_worksheet(0)
-    df = pd.DataFrame(worksheet.get_all_records())
-    for tipo in tipos:
-        col_pergunta = tipo
-        col_peso = f"Peso_{tipo}"
-        if col_pergunta in df.columns and col_peso in df.columns:
-            for _, linha in df.iterrows():
-                pergunta = str(linha[col_pergunta]).strip()
-                try:
-                    peso = float(
-                        str(linha[col_peso])
-                        .replace(",", ".")
-                        .replace("%", "")
-                        .strip()
+        wb = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            for ws in wb.worksheets:
+                tipo_aba = normalizar_tipo(ws.title)
+                linhas_ws = ws.iter_rows(values_only=True)
+                cabecalho = next(linhas_ws, None)
+                if not cabecalho:
+                    continue
+                cabecalho = [
+                    str(c).strip() if c is not None else f"_col{i}"
+                    for i, c in enumerate(cabecalho)
+                ]
+                if not tipo_aba and "Tipo" not in cabecalho and not tipo_padrao:
+                    continue
+                acumulado, primeira_linha = [], 2
+                for n, linha in enumerate(linhas_ws, start=2):
+                    if linha is None or all(v is None for v in linha):
+                        continue
+                    if not acumulado:
+                        primeira_linha = n
+                    linha = tuple(linha[: len(cabecalho)])
+                    acumulado.append(linha + (None,) * (len(cabecalho) - len(linha)))
+                    if len(acumulado) >= LINHAS_POR_BLOCO_LEITURA:
+                        blocos.append(
+                            _montar_bloco(cabecalho, acumulado, ws.title, tipo_aba, primeira_linha)
+                        )
+                        acumulado = []
+                if acumulado:
+                    blocos.append(
+                        _montar_bloco(cabecalho, acumulado, ws.title, tipo_aba, primeira_linha)
                     )
-                except Exception:
-                    peso = 0
-                if pergunta and pergunta.lower() != "nan" and peso > 0:
-                    perguntas[tipo].append((pergunta, peso / 100.0))
-    return perguntas
-
-def padronizar_colunas(df, todas_colunas):
-    for col in todas_colunas:
-        if col not in df.columns:
-            df[col] = ""
-    for col in list(df.columns):
-        if col not in todas_colunas:
-            df.drop(columns=[col], inplace=True)
-    return df[todas_colunas]
+        finally:
+            wb.close()
 
-def carregar_acessos():
-    sheet = conectar_planilha(ACESSOS_ID)
-    acessos = pd.DataFrame(sheet.worksheet("Acessos").get_all_records())
-    categorias = pd.DataFrame(sheet.worksheet("Categorias").get_all_records())
-    return acessos, categorias
+    if not blocos:
+        return pd.DataFrame()
+    return pd.concat(blocos, ignore_index=True)
+
+def _texto_data_hora(serie, formato):
+    """Datas/horas vindas do Excel (datetime/time) -> texto no formato do app."""
+    return serie.map(
+        lambda v: v.strftime(formato)
+        if hasattr(v, "strftime")
+        else ("" if v is None or (isinstance(v, float) and np.isnan(v)) else str(v).strip())
+    )
 
-# --------------------------------------------------------------------------------
-# Leitura das respostas (DataFrame + linhas brutas)
-# --------------------------------------------------------------------------------
-def obter_df_resposta(aba_ou_tipo):
+def validar_importacao(df, perguntas_ref, acessos, categorias):
     """
-    Retorna:
-      - df: DataFrame com os dados (notas como float, quando possível)
-      - headers: lista com os cabeçalhos da planilha
-      - raw_rows: lista de listas com as linhas de dados exatamente como estão no Sheets
+    Validação vetorizada de todas as linhas importadas de uma só vez.
+    Confere e-mail/tipo/categoria contra Acessos, (categoria, fornecedor)
+    contra Categorias e cada nota contra NOTAS_COM_TEC.
+    Retorna (df_normalizado, erros), onde erros é uma Series de textos
+    (vazia quando a linha é válida) alinhada ao índice de df.
     """
-    sheet = conectar_planilha(RESPOSTAS_ID)
-    aba_real = mapear_tipo_para_aba(aba_ou_tipo)
-    try:
-        worksheet = sheet.worksheet(aba_real)
-    except WorksheetNotFound:
-        return pd.DataFrame(), [], []
-
-    # Cabeçalhos e dados brutos
-    all_values = worksheet.get_all_values()
-    if not all_values:
-        return pd.DataFrame(), [], []
-    headers = all_values[0]
-    raw_rows = all_values[1:]  # sem cabeçalho
-
-    if not raw_rows:
-        return pd.DataFrame(columns=headers), headers, raw_rows
-
-    df = pd.DataFrame(raw_rows, columns=headers)
-
-    # Converter colunas de notas para float interno
-    for col in df.columns:
-        if col not in ["Data", "Hora", "E-mail", "Categoria", "Fornecedor", "Tipo"]:
-            df[col] = df[col].apply(to_number)
-
-    return df, headers, raw_rows
-
-def obter_todas_respostas():
-    tipos_logicos = ["Comercial", "Técnica", "ESG"]
-    frames = []
-    for tipo in tipos_logicos:
-        df, _, _ = obter_df_resposta(tipo)
-        if not df.empty:
-            df["Tipo"] = tipo
-            frames.append(df)
-    if frames:
-        return pd.concat(frames, ignore_index=True)
-    else:
-        return pd.DataFrame()
+    erros = pd.Series("", index=df.index, dtype=object)
 
-# --------------------------------------------------------------------------------
-# Escrita segura: atualiza/insere UMA linha, sem regravar a aba inteira
-# --------------------------------------------------------------------------------
-def salvar_df_em_planilha(aba, headers, raw_rows, df_novo, email, categoria, fornecedor):
+    def _marcar(mask, msg):
+        erros.loc[mask] = erros.loc[mask] + msg + "; "
+
+    for col in ["E-mail", "Categoria", "Fornecedor"]:
+        if col not in df.columns:
+            df[col] = ""
+    out = pd.DataFrame(index=df.index)
+    out["Tipo"] = df["Tipo"].map(normalizar_tipo)
+    out["E-mail"] = df["E-mail"].fillna("").astype(str).str.strip()
+    out["Categoria"] = df["Categoria"].fillna("").astype(str).str.strip()
+    out["Fornecedor"] = df["Fornecedor"].fillna("").astype(str).str.strip()
+    hoje = datetime.now()
+    out["Data"] = (
+        _texto_data_hora(df["Data"], "%d/%m/%Y")
+        if "Data" in df.columns
+        else pd.Series("", index=df.index)
+    ).replace("", hoje.strftime("%d/%m/%Y"))
+    out["Hora"] = (
+        _texto_data_hora(df["Hora"], "%H:%M:%S")
+        if "Hora" in df.columns
+        else pd.Series("", index=df.index)
+    ).replace("", hoje.strftime("%H:%M:%S"))
+
+    _marcar(out["Tipo"] == "", "tipo ausente ou inválido")
+    for col in ["E-mail", "Categoria", "Fornecedor"]:
+        _marcar(out[col] == "", f"{col} vazio")
+
+    chaves_acesso = pd.MultiIndex.from_arrays(
+        [
+            acessos.iloc[:, 0].astype(str).str.strip().str.lower(),
+            acessos.iloc[:, 1].astype(str).str.strip().str.lower(),
+            acessos.iloc[:, 2].astype(str).str.strip(),
+        ]
+    )
+    tem_acesso = pd.MultiIndex.from_arrays(
+        [out["E-mail"].str.lower(), out["Tipo"].str.lower(), out["Categoria"]]
+    ).isin(chaves_acesso)
+    _marcar(~tem_acesso & (out["Tipo"] != ""), "e-mail sem acesso a este tipo/categoria")
+
+    chaves_forn = pd.MultiIndex.from_arrays(
+        [
+            categorias.iloc[:, 0].astype(str).str.strip(),
+            categorias.iloc[:, 1].astype(str).str.strip(),
+        ]
+    )
+    forn_ok = pd.MultiIndex.from_arrays(
+        [out["Categoria"], out["Fornecedor"]]
+    ).isin(chaves_forn)
+    _marcar(~forn_ok, "fornecedor não pertence à categoria")
+
+    escala = np.array(NOTAS_COM_TEC)
+    for tipo, lista in perguntas_ref.items():
+        mask_tipo = (out["Tipo"] == tipo).to_numpy()
+        if not mask_tipo.any():
+            continue
+        for pergunta, _ in lista:
+            if pergunta not in df.columns:
+                _marcar(mask_tipo, f"coluna ausente: {pergunta.splitlines()[0]}")
+                continue
+            bruto = df.loc[mask_tipo, pergunta]
+            notas = pd.to_numeric(
+                bruto.astype(str).str.strip().str.replace(",", ".", regex=False),
+                errors="coerce",
+            )
+            out.loc[mask_tipo, pergunta] = notas
+            vazias = notas.isna()
+            fora = ~vazias & ~np.isclose(
+                notas.to_numpy()[:, None], escala[None, :]
+            ).any(axis=1)
+            _marcar(notas.index[vazias], f"nota ausente: {pergunta.splitlines()[0]}")
+            _marcar(notas.index[fora], f"nota fora da escala: {pergunta.splitlines()[0]}")
+
+    return out, erros.str.rstrip("; ")
+
+def importar_avaliacoes(df, perguntas_ref, acessos, categorias):
     """
-    Atualiza ou insere a linha correspondente a (email, categoria, fornecedor) na aba.
-    - headers: cabeçalhos existentes na planilha
-    - raw_rows: linhas de dados existentes (listas de strings)
-    - df_novo: DataFrame com TODAS as linhas (após lógica de substituição)
-               – usamos ele apenas para pegar a linha que queremos escrever.
-    Somente a linha do usuário-alvo é escrita; as demais linhas permanecem
-    exatamente como estão no Sheets.
+    Valida e grava (upsert em lote, uma aba por tipo) as linhas importadas.
+    Linhas válidas com a mesma chave (e-mail, tipo, categoria, fornecedor):
+    vale a última do arquivo e as anteriores saem como "Duplicada".
+    Retorna o relatório por linha: Origem, Linha, Status e Erros.
     """
-    sheet = conectar_planilha(RESPOSTAS_ID)
-    aba_real = mapear_tipo_para_aba(aba)
+    out, erros = validar_importacao(df, perguntas_ref, acessos, categorias)
+    validas = erros == ""
+
+    chaves = pd.DataFrame(
+        {
+            "E-mail": out["E-mail"].str.lower(),
+            "Tipo": out["Tipo"],
+            "Categoria": out["Categoria"],
+            "Fornecedor": out["Fornecedor"],
+        }
+    )[validas]
+    # Para cada linha válida, o índice da última linha com a mesma chave
+    ultima = (
+        chaves.index.to_series()
+        .groupby([chaves[c] for c in chaves.columns], sort=False)
+        .transform("last")
+    )
+    ultima = ultima[ultima != ultima.index]
+    substituidas = df.index.isin(ultima.index)
+    erros = erros.copy()
+    erros.loc[ultima.index] = (
+        "chave repetida no arquivo; vale a linha "
+        + df.loc[ultima, "Linha"].astype(str).to_numpy()
+        + " ("
+        + df.loc[ultima, "Origem"].astype(str).to_numpy()
+        + ")"
+    )
 
-    try:
-        worksheet = sheet.worksheet(aba_real)
-    except WorksheetNotFound:
-        # Criar aba do zero com cabeçalho + primeira linha
-        try:
-            worksheet = sheet.add_worksheet(title=aba_real, rows="100", cols="50")
-        except APIError as e:
-            st.error(
-                "Não foi possível criar a aba no Google Sheets. "
-                "Verifique limites de abas e permissões."
-            )
-            st.write("Detalhes técnicos (para o administrador):", str(e))
-            raise
-
-        # Escreve cabeçalhos
-        worksheet.update("A1", [headers])
-        # Encontrar linha nova no df_novo
-        linha_nova = df_novo[
-            (df_novo["E-mail"].astype(str).str.lower() == email.lower())
-            & (df_novo["Categoria"] == categoria)
-            & (df_novo["Fornecedor"] == fornecedor)
-        ].iloc[0]
-        valores = [str(linha_nova.get(col, "")) for col in headers]
-        worksheet.append_row(valores, value_input_option="USER_ENTERED")
-        return
-
-    # Se a aba já existe:
-    # 1) procurar se já há linha correspondente a esse (email, categoria, fornecedor)
-    indice_encontrado = None  # índice em raw_rows (0-based)
-    if headers:
-        try:
-            idx_email = headers.index("E-mail")
-            idx_cat = headers.index("Categoria")
-            idx_forn = headers.index("Fornecedor")
-        except ValueError:
-            idx_email = idx_cat = idx_forn = None
-
-        if idx_email is not None and idx_cat is not None and idx_forn is not None:
-            for i, row in enumerate(raw_rows):
-                try:
-                    r_email = row[idx_email]
-                    r_cat = row[idx_cat]
-                    r_forn = row[idx_forn]
-                except IndexError:
-                    continue
-                if (
-                    str(r_email).strip().lower() == email.lower()
-                    and str(r_cat) == categoria
-                    and str(r_forn) == fornecedor
-                ):
-                    indice_encontrado = i
-                    break
-
-    # 2) pegar do df_novo a linha que devemos escrever
-    linha_nova = df_novo[
-        (df_novo["E-mail"].astype(str).str.lower() == email.lower())
-        & (df_novo["Categoria"] == categoria)
-        & (df_novo["Fornecedor"] == fornecedor)
-    ]
-    if linha_nova.empty:
-        # nada para escrever
-        return
-    linha_nova = linha_nova.iloc[0]
-    valores = [linha_nova.get(col, "") for col in headers]
-
-    # 3) escreve somente essa linha
-    try:
-        if indice_encontrado is None:
-            # Nova linha: append ao final
-            worksheet.append_row(valores, value_input_option="USER_ENTERED")
-        else:
-            # Atualização: linha de dados começa na linha 2 (linha 1 = cabeçalho)
-            linha_planilha = indice_encontrado + 2
-            col_ini = 1
-            col_fim = len(headers)
-            # Range no formato A{linha}:Z{linha} etc.
-            col_letras = []
-            for c in range(col_ini, col_fim + 1):
-                # conversão coluna numérica -> letra (1->A, 2->B, ..., 27->AA...)
-                n = c
-                s = ""
-                while n > 0:
-                    n, r = divmod(n - 1, 26)
-                    s = chr(65 + r) + s
-                col_letras.append(s)
-            range_str = f"{col_letras[0]}{linha_planilha}:{col_letras[-1]}{linha_planilha}"
-            worksheet.update(range_str, [valores], value_input_option="USER_ENTERED")
-    except APIError as e:
-        st.error(
-            "Erro ao salvar dados na planilha do Google Sheets. "
-            "Tente novamente em alguns instantes."
-        )
-        st.write("Detalhes técnicos (para o administrador):", str(e))
-        raise
+    for tipo, lista in perguntas_ref.items():
+        linhas_tipo = out[validas & (out["Tipo"] == tipo)]
+        if not linhas_tipo.empty:
+            gravar_linhas_em_lote(tipo, lista, linhas_tipo)
+    return pd.DataFrame(
+        {
+            "Origem": df["Origem"],
+            "Linha": df["Linha"],
+            "Status": np.select(
+                [~validas, substituidas], ["Erro", "Duplicada"], default="Importada"
+            ),
+            "Erros": erros,
+        }
+    )
 
 # --------------------------------------------------------------------------------
-# Lógica de salvar resposta ponderada
+# Painel admin: artefatos em cache pela versão dos dados
 # --------------------------------------------------------------------------------
-def salvar_resposta_ponderada(tipo, email, categoria, fornecedor, respostas, perguntas):
-    hoje = datetime.now()
-    data_str = hoje.strftime("%d/%m/%Y")
-    hora_str = hoje.strftime("%H:%M:%S")
-    aba = mapear_tipo_para_aba(tipo)
-
-    df_existente, headers_existentes, raw_rows = obter_df_resposta(aba)
+COLUNAS_TOP3_NECESSARIAS = ["Categoria", "Fornecedor", "Tipo", "Total Ponderado (recalc)"]
+COLUNAS_CONTAGEM_NECESSARIAS = ["E-mail", "Categoria", "Fornecedor", "Tipo"]
 
-    colunas_fixas = ["Data", "Hora", "E-mail", "Categoria", "Fornecedor"]
-    colunas_perguntas = [q for (q, p) in perguntas]
-    colunas_ponderada = [q + " (PONDERADA)" for (q, p) in perguntas]
-    todas_colunas = colunas_fixas + colunas_perguntas + colunas_ponderada
+def _csv(df):
+    return df.to_csv(index=False).encode("utf-8")
 
-    # Se ainda não há cabeçalho na planilha, usaremos esse conjunto
-    if not headers_existentes:
-        headers_existentes = todas_colunas
-    else:
-        # Se já há cabeçalho, usa o que já existe (não mexe em ordem/nome)
-        # e garante que todas_colunas seja compatível com ele
-        for col in todas_colunas:
-            if col not in headers_existentes:
-                headers_existentes.append(col)
-
-    notas_puras = []
-    notas_ponderadas = []
-    for (pergunta, peso) in perguntas:
-        nota = to_number(respostas[pergunta])
-        notas_puras.append(nota)
-        ponderada = nota * peso if nota is not None else np.nan
-        notas_ponderadas.append(ponderada)
-
-    nova_linha = [data_str, hora_str, email, categoria, fornecedor] + notas_puras + notas_ponderadas
-    nova_df = pd.DataFrame([nova_linha], columns=todas_colunas)
-
-    if not df_existente.empty:
-        df_existente = padronizar_colunas(df_existente, todas_colunas)
-        nova_df = padronizar_colunas(nova_df, todas_colunas)
-        mask = (
-            df_existente["E-mail"].astype(str).str.lower() == email.lower()
-        ) & (df_existente["Categoria"] == categoria) & (
-            df_existente["Fornecedor"] == fornecedor
-        )
-        df_existente = df_existente[~mask]
-        df_final = pd.concat([df_existente, nova_df], ignore_index=True)
-    else:
-        df_final = nova_df
-
-    salvar_df_em_planilha(
-        aba,
-        headers_existentes,
-        raw_rows,
-        df_final,
-        email,
-        categoria,
-        fornecedor,
-    )
-    return aba, df_final
+@st.cache_resource(show_spinner="Calculando o painel...", max_entries=8)
+def montar_painel_admin(versao, incluir_ic, _df_respostas, _perguntas_ref, _acessos, _categorias):
+    """
+    Calcula todos os artefatos do painel admin (totais, Top 3, contagens,
+    progresso, base da simulação de pesos, tabelas por tipo e os CSVs de
+    download) de uma vez.
+    Os argumentos com "_" não entram no hash do cache: a chave é `versao`
+    (ver versao_dados), então só recalcula quando respostas, perguntas/pesos,
+    Acessos ou Categorias mudam. Downloads e troca de abas reaproveitam tudo.
+    O painel é o mesmo objeto para todas as sessões (sem cópia a cada
+    acesso): quem usa só lê.
+    """
+    df = _df_respostas.copy()
+    total_recalc, respondidas, total_perguntas = calcular_totais(df, _perguntas_ref)
+    df["Total Ponderado (recalc)"] = total_recalc
+    painel = {"versao": versao, "csv": {}}
+
+    painel["faltando_top3"] = [c for c in COLUNAS_TOP3_NECESSARIAS if c not in df.columns]
+    painel["top3"] = None
+    if not painel["faltando_top3"]:
+        df_top3 = calcular_top3(df)
+        if incluir_ic and not df_top3.empty:
+            df_top3 = adicionar_intervalos_top3(df_top3, df)
+        painel["top3"] = df_top3
+        painel["csv"]["top3"] = _csv(df_top3)
+
+    painel["faltando_contagem"] = [
+        c for c in COLUNAS_CONTAGEM_NECESSARIAS if c not in df.columns
+    ]
+    painel["contagem"] = painel["detalhes_incompletas"] = None
+    if not painel["faltando_contagem"]:
+        contagem, detalhes = calcular_contagem(df, respondidas, total_perguntas)
+        contagem = contagem.sort_values(["E-mail", "Categoria", "Tipo"])
+        detalhes = detalhes.sort_values(["E-mail", "Categoria", "Tipo", "Fornecedor"])
+        painel["contagem"] = contagem
+        painel["detalhes_incompletas"] = detalhes
+        painel["csv"]["contagem"] = _csv(contagem)
+        painel["csv"]["detalhes_incompletas"] = _csv(detalhes)
+
+    pendentes, prog_avaliador, prog_categoria = calcular_progresso(df, _acessos, _categorias)
+    painel["pendentes"] = pendentes
+    painel["progresso_avaliador"] = prog_avaliador
+    painel["progresso_categoria"] = prog_categoria
+    painel["csv"]["pendentes"] = _csv(pendentes)
+    painel["csv"]["progresso_avaliador"] = _csv(prog_avaliador)
+    painel["csv"]["progresso_categoria"] = _csv(prog_categoria)
+
+    painel["simulacao"] = base_simulacao_pesos(df, _perguntas_ref)
+
+    painel["por_tipo"] = {}
+    for tipo_t in TIPOS_LOGICOS:
+        dft = tabela_exibicao(df[df["Tipo"] == tipo_t])
+        painel["por_tipo"][tipo_t] = dft
+        painel["csv"][f"tipo_{tipo_t}"] = _csv(dft)
+    return painel
 
 # --------------------------------------------------------------------------------
 # Demais funções (sem alterações de lógica)
@@ -370,6 +386,12 @@ def wrap_col_names(df, width=25):
     ]
     return df
 
+def mostrar_erro_planilha(erro):
+    """Mensagem de ErroPlanilha para o usuário e detalhes para o administrador; encerra o rerun."""
+    st.error(str(erro))
+    st.write("Detalhes técnicos (para o administrador):", str(erro.__cause__))
+    st.stop()
+
 # --------------------------------------------------------------------------------
 # Configuração de página e CSS
 # --------------------------------------------------------------------------------
@@ -429,8 +451,12 @@ st.markdown(
 # --------------------------------------------------------------------------------
 # Estado de sessão
 # --------------------------------------------------------------------------------
-perguntas_ref = ler_perguntas()
-acessos, categorias_df = carregar_acessos()
+# Conta de serviço do Google Sheets (dispensada no modo offline)
+if not MODO_OFFLINE:
+    configurar_credenciais(dict(st.secrets["gspread"]))
+
+# Perguntas, Acessos e Categorias lidos em paralelo
+perguntas_ref, acessos, categorias_df = carregar_base()
 
 if "email_logado" not in st.session_state:
     st.session_state.email_logado = ""
@@ -511,7 +537,22 @@ if st.session_state.pagina == "login":
 if st.session_state.pagina == "admin" and st.session_state.admin_mode:
     st.title("Painel Administrador")
 
-    df_respostas = obter_todas_respostas()
+    ciclos = ciclos_disponiveis()
+    if CICLO_ATUAL not in ciclos:
+        ciclos.append(CICLO_ATUAL)
+    ciclos = sorted(ciclos)
+    ciclo_admin = CICLO_ATUAL
+    if len(ciclos) > 1:
+        ciclo_admin = st.selectbox(
+            "Ciclo de avaliação",
+            ciclos,
+            index=ciclos.index(CICLO_ATUAL),
+            format_func=lambda c: c or "Sem ciclo (abas originais)",
+        )
+
+    if st.button("Recarregar respostas da planilha"):
+        invalidar_cache_respostas()
+    df_respostas = obter_todas_respostas(ciclo_admin)
 
     if df_respostas.empty:
         st.warning("Nenhuma avaliação registrada ainda.")
@@ -519,95 +560,50 @@ if st.session_state.pagina == "admin" and st.session_state.admin_mode:
         st.info(
             f"Total de registros de avaliações: {len(df_respostas)}"
         )
+        with st.expander("Uso de memória das respostas"):
+            st.dataframe(
+                relatorio_memoria(df_respostas),
+                use_container_width=True,
+                hide_index=True,
+            )
 
-        pesos_map = {}
-        for tipo_nome, lista_q in perguntas_ref.items():
-            pesos_map[tipo_nome] = {q: float(p) for (q, p) in lista_q}
-
-        def _to_float(x):
-            return to_number(x)
-
-        def recalc_total_por_linha(row):
-            tipo = str(row.get("Tipo", "")).strip()
-            pesos = pesos_map.get(tipo, {})
-            total = 0.0
-            for q, w in pesos.items():
-                if q in row:
-                    v = _to_float(row[q])
-                    if pd.notnull(v):
-                        total += v * w
-            return total
-
-        df_respostas["Total Ponderado (recalc)"] = df_respostas.apply(
-            recalc_total_por_linha, axis=1
+        headers_por_aba = df_respostas.attrs.get("headers", {})
+        for aba_h, (tipo_nome, headers_h) in headers_por_aba.items():
+            esquema = esquema_aba(perguntas_ref.get(tipo_nome, []), headers_h)
+            if esquema["drift"]:
+                st.warning(
+                    f"Cabeçalho da aba {aba_h} difere das perguntas atuais. "
+                    + descrever_drift(esquema)
+                )
+
+        incluir_ic = st.checkbox(
+            "Incluir intervalos de confiança e estabilidade do ranking (bootstrap)",
+            value=False,
+            help=(
+                "Reamostra as avaliações de cada fornecedor e informa o "
+                "intervalo de 95% da Nota Final e a probabilidade de o "
+                "fornecedor ficar no Top 3 / em 1º lugar da categoria."
+            ),
         )
+        painel = montar_painel_admin(
+            versao_dados(df_respostas, perguntas_ref, acessos, categorias_df),
+            incluir_ic,
+            df_respostas,
+            perguntas_ref,
+            acessos,
+            categorias_df,
+        )
+        csv_painel = painel["csv"]
 
         # Top 3
         st.subheader(
             "Top 3 Fornecedores por Categoria (Nota Final = (Comercial + Técnica + ESG) / 3)"
         )
-        req_cols_top3 = [
-            "Categoria",
-            "Fornecedor",
-            "Tipo",
-            "Total Ponderado (recalc)",
-        ]
-        faltando_top3 = [
-            c for c in req_cols_top3 if c not in df_respostas.columns
-        ]
-        if faltando_top3:
-            st.error(f"Colunas ausentes para o Top 3: {faltando_top3}")
+        if painel["faltando_top3"]:
+            st.error(f"Colunas ausentes para o Top 3: {painel['faltando_top3']}")
         else:
-            base = df_respostas[req_cols_top3].dropna(
-                subset=["Categoria", "Fornecedor", "Tipo"]
-            ).copy()
-            base["Tipo"] = base["Tipo"].astype(str).str.strip()
-            tipo_media = (
-                base.groupby(["Categoria", "Fornecedor", "Tipo"], as_index=False)[
-                    "Total Ponderado (recalc)"
-                ]
-                .mean()
-                .rename(
-                    columns={
-                        "Total Ponderado (recalc)": "Média por Tipo"
-                    }
-                )
-            )
-            pivot = (
-                tipo_media.pivot_table(
-                    index=["Categoria", "Fornecedor"],
-                    columns="Tipo",
-                    values="Média por Tipo",
-                    aggfunc="first",
-                ).reset_index()
-            )
-            for t in ["Comercial", "Técnica", "ESG"]:
-                if t not in pivot.columns:
-                    pivot[t] = 0.0
-            pivot["Nota Final"] = (
-                pivot["Comercial"].fillna(0)
-                + pivot["Técnica"].fillna(0)
-                + pivot["ESG"].fillna(0)
-            ) / 3.0
-            top3_list = []
-            for categoria_val, dfcat in pivot.groupby(
-                "Categoria", dropna=False
-            ):
-                top = dfcat.sort_values(
-                    "Nota Final", ascending=False
-                ).head(3)[
-                    [
-                        "Categoria",
-                        "Fornecedor",
-                        "Comercial",
-                        "Técnica",
-                        "ESG",
-                        "Nota Final",
-                    ]
-                ]
-                top3_list.append(top)
-            if top3_list:
-                df_top3 = pd.concat(top3_list, ignore_index=True)
+            df_top3 = painel["top3"]
+            if not df_top3.empty:
                 st.dataframe(
                     df_top3,
                     use_container_width=True,
@@ -615,7 +611,7 @@ if st.session_state.pagina == "admin" and st.session_state.admin_mode:
                 )
                 st.download_button(
                     "Baixar Top 3 por Categoria (CSV)",
-                    df_top3.to_csv(index=False).encode("utf-8"),
+                    csv_painel["top3"],
                     file_name="top3_por_categoria.csv",
                     mime="text/csv",
                 )
@@ -624,80 +620,87 @@ if st.session_state.pagina == "admin" and st.session_state.admin_mode:
                     "Sem dados suficientes para calcular Top 3 por categoria."
                 )
 
+        # Simulação de pesos (what-if)
+        with st.expander("Simulação de pesos (what-if)"):
+            st.caption(
+                "Altere os pesos para ver como o ranking mudaria. Nada é "
+                "gravado na planilha de perguntas."
+            )
+            pesos_oficiais = {
+                t: [peso for _, peso in perguntas_ref.get(t, [])]
+                for t in TIPOS_LOGICOS
+            }
+            pesos_simulados = {}
+            for aba_w, tipo_t in zip(st.tabs(TIPOS_LOGICOS), TIPOS_LOGICOS):
+                with aba_w:
+                    lista_q = perguntas_ref.get(tipo_t, [])
+                    if not lista_q:
+                        st.info(f"Sem perguntas do tipo {tipo_t}.")
+                        pesos_simulados[tipo_t] = []
+                        continue
+                    pesos_pct = [round(100.0 * peso, 4) for _, peso in lista_q]
+                    editor_pesos = st.data_editor(
+                        pd.DataFrame(
+                            {
+                                "Pergunta": [q for q, _ in lista_q],
+                                "Peso oficial (%)": pesos_pct,
+                                "Peso simulado (%)": pesos_pct,
+                            }
+                        ),
+                        disabled=["Pergunta", "Peso oficial (%)"],
+                        column_config={
+                            "Peso simulado (%)": st.column_config.NumberColumn(
+                                min_value=0.0, max_value=100.0, step=0.5
+                            )
+                        },
+                        hide_index=True,
+                        use_container_width=True,
+                        key=f"pesos_simulados_{tipo_t}",
+                    )
+                    pesos = (
+                        pd.to_numeric(editor_pesos["Peso simulado (%)"], errors="coerce")
+                        .fillna(0.0)
+                        .to_numpy()
+                        / 100.0
+                    )
+                    st.caption(f"Soma dos pesos simulados: {100.0 * pesos.sum():.1f}%")
+                    pesos_simulados[tipo_t] = pesos
+            apenas_top3 = st.checkbox(
+                "Mostrar só fornecedores no Top 3 em algum dos cenários",
+                value=True,
+                key="simulacao_apenas_top3",
+            )
+            comparacao = comparar_pesos(
+                painel["simulacao"],
+                pesos_oficiais,
+                pesos_simulados,
+                apenas_top=3 if apenas_top3 else None,
+            )
+            n_mudancas = int((comparacao["Movimento"] != 0).sum())
+            st.markdown(
+                f"**{n_mudancas}** fornecedor(es) mudam de posição "
+                "(Movimento > 0: sobe; < 0: desce)."
+            )
+            st.dataframe(comparacao, use_container_width=True, hide_index=True)
+            st.download_button(
+                "Baixar Simulação (CSV)",
+                comparacao.to_csv(index=False).encode("utf-8"),
+                file_name="simulacao_pesos.csv",
+                mime="text/csv",
+            )
+
         # Contagem completas/incompletas
         st.subheader(
             "Contagem de Avaliações Completas e Incompletas por E-mail, Categoria e Tipo"
         )
 
-        req_cols_cnt = ["E-mail", "Categoria", "Fornecedor", "Tipo"]
-        faltando_cnt = [
-            c for c in req_cols_cnt if c not in df_respostas.columns
-        ]
-        if faltando_cnt:
+        if painel["faltando_contagem"]:
             st.error(
-                f"Colunas ausentes para esta contagem: {faltando_cnt}"
+                f"Colunas ausentes para esta contagem: {painel['faltando_contagem']}"
             )
         else:
-            questoes_map = {
-                tipo: [q for (q, _) in lista]
-                for tipo, lista in perguntas_ref.items()
-            }
-
-            def conta_respondidas(row):
-                tipo = str(row.get("Tipo", "")).strip()
-                qs = questoes_map.get(tipo, [])
-                respondidas = 0
-                for q in qs:
-                    if q in row:
-                        val = row[q]
-                        if (
-                            pd.notnull(val)
-                            and str(val).strip() != ""
-                        ):
-                            respondidas += 1
-                return pd.Series(
-                    {
-                        "Respondidas": respondidas,
-                        "TotalPerguntas": len(qs),
-                    }
-                )
-
-            tmp = df_respostas.copy()
-            aux = tmp.apply(conta_respondidas, axis=1)
-            tmp["Respondidas"] = aux["Respondidas"]
-            tmp["TotalPerguntas"] = aux["TotalPerguntas"]
-            tmp["Completa?"] = (tmp["TotalPerguntas"] > 0) & (
-                tmp["Respondidas"] == tmp["TotalPerguntas"]
-            )
-
-            completos = (
-                tmp[tmp["Completa?"]]
-                .groupby(
-                    ["E-mail", "Categoria", "Tipo"], as_index=False
-                )["Fornecedor"]
-                .nunique()
-                .rename(columns={"Fornecedor": "Completas"})
-            )
-            incompletos = (
-                tmp[~tmp["Completa?"]]
-                .groupby(
-                    ["E-mail", "Categoria", "Tipo"], as_index=False
-                )["Fornecedor"]
-                .nunique()
-                .rename(columns={"Fornecedor": "Incompletas"})
-            )
-
-            contagem = pd.merge(
-                completos,
-                incompletos,
-                on=["E-mail", "Categoria", "Tipo"],
-                how="outer",
-            ).fillna(0)
-            for c in ["Completas", "Incompletas"]:
-                contagem[c] = contagem[c].astype(int)
-            contagem["Total Fornecedores Avaliados"] = (
-                contagem["Completas"] + contagem["Incompletas"]
-            )
+            contagem = painel["contagem"]
+            detalhes_incomp = painel["detalhes_incompletas"]
 
             if contagem.empty:
                 st.info(
@@ -705,15 +708,13 @@ if st.session_state.pagina == "admin" and st.session_state.admin_mode:
                 )
             else:
                 st.dataframe(
-                    contagem.sort_values(
-                        ["E-mail", "Categoria", "Tipo"]
-                    ),
+                    contagem,
                     use_container_width=True,
                     hide_index=True,
                 )
                 st.download_button(
                     "Baixar Contagem (CSV)",
-                    contagem.to_csv(index=False).encode("utf-8"),
+                    csv_painel["contagem"],
                     file_name="contagem_completas_incompletas_por_email_categoria_tipo.csv",
                     mime="text/csv",
                 )
@@ -721,40 +722,74 @@ if st.session_state.pagina == "admin" and st.session_state.admin_mode:
             st.markdown(
                 "Detalhes das avaliações incompletas (por fornecedor):"
             )
-            detalhes_incomp = tmp[~tmp["Completa?"]][
-                [
-                    "E-mail",
-                    "Categoria",
-                    "Tipo",
-                    "Fornecedor",
-                    "Respondidas",
-                    "TotalPerguntas",
-                ]
-            ].copy()
             if detalhes_incomp.empty:
                 st.info("Sem avaliações incompletas.")
             else:
                 st.dataframe(
-                    detalhes_incomp.sort_values(
-                        [
-                            "E-mail",
-                            "Categoria",
-                            "Tipo",
-                            "Fornecedor",
-                        ]
-                    ),
+                    detalhes_incomp,
                     use_container_width=True,
                     hide_index=True,
                 )
                 st.download_button(
                     "Baixar Detalhes Incompletas (CSV)",
-                    detalhes_incomp.to_csv(index=False).encode(
-                        "utf-8"
-                    ),
+                    csv_painel["detalhes_incompletas"],
                     file_name="detalhes_avaliacoes_incompletas.csv",
                     mime="text/csv",
                 )
 
+        # Progresso por atribuição
+        st.subheader("Progresso por Atribuição (Acessos × Categorias)")
+        pendentes = painel["pendentes"]
+        prog_avaliador = painel["progresso_avaliador"]
+        prog_categoria = painel["progresso_categoria"]
+        total_esperadas = int(prog_avaliador["Esperadas"].sum())
+        if total_esperadas == 0:
+            st.info("Nenhuma atribuição encontrada em Acessos/Categorias.")
+        else:
+            total_enviadas = int(prog_avaliador["Enviadas"].sum())
+            col_e, col_v, col_p = st.columns(3)
+            col_e.metric("Atribuições", total_esperadas)
+            col_v.metric("Enviadas", total_enviadas)
+            col_p.metric(
+                "Progresso", f"{100.0 * total_enviadas / total_esperadas:.1f}%"
+            )
+            aba_aval, aba_cat, aba_pend = st.tabs(
+                ["Por avaliador", "Por categoria", "Pendentes"]
+            )
+            with aba_aval:
+                st.dataframe(
+                    prog_avaliador, use_container_width=True, hide_index=True
+                )
+                st.download_button(
+                    "Baixar Progresso por Avaliador (CSV)",
+                    csv_painel["progresso_avaliador"],
+                    file_name="progresso_por_avaliador.csv",
+                    mime="text/csv",
+                )
+            with aba_cat:
+                st.dataframe(
+                    prog_categoria, use_container_width=True, hide_index=True
+                )
+                st.download_button(
+                    "Baixar Progresso por Categoria (CSV)",
+                    csv_painel["progresso_categoria"],
+                    file_name="progresso_por_categoria.csv",
+                    mime="text/csv",
+                )
+            with aba_pend:
+                if pendentes.empty:
+                    st.success("Todas as atribuições já têm avaliação.")
+                else:
+                    st.dataframe(
+                        pendentes, use_container_width=True, hide_index=True
+                    )
+                    st.download_button(
+                        "Baixar Atribuições Pendentes (CSV)",
+                        csv_painel["pendentes"],
+                        file_name="atribuicoes_pendentes.csv",
+                        mime="text/csv",
+                    )
+
         # Tabelas por tipo
         st.subheader("Todas as Avaliações por Tipo")
         abas = st.tabs(["Comercial", "Técnica", "ESG"])
@@ -762,7 +797,7 @@ if st.session_state.pagina == "admin" and st.session_state.admin_mode:
 
         for aba_st, tipo_t in zip(abas, tipos_ordem):
             with aba_st:
-                dft = df_respostas[df_respostas["Tipo"] == tipo_t]
+                dft = painel["por_tipo"][tipo_t]
                 if dft.empty:
                     st.info(
                         f"Sem avaliações do tipo {tipo_t}."
@@ -775,11 +810,62 @@ if st.session_state.pagina == "admin" and st.session_state.admin_mode:
                     )
                     st.download_button(
                         f"Baixar {tipo_t} (CSV)",
-                        dft.to_csv(index=False).encode("utf-8"),
+                        csv_painel[f"tipo_{tipo_t}"],
                         file_name=f"avaliacoes_{tipo_t.lower()}.csv",
                         mime="text/csv",
                     )
 
+    # Importação em lote
+    st.subheader("Importar Avaliações em Lote (XLSX/CSV)")
+    st.caption(
+        "Colunas esperadas: E-mail, Categoria, Fornecedor, uma coluna por pergunta "
+        "(nota pura) e, opcionalmente, Data e Hora. No XLSX, abas chamadas "
+        "Comercial, Técnica ou Esg definem o tipo; nos demais casos use a coluna Tipo."
+    )
+    arquivo_import = st.file_uploader(
+        "Arquivo de avaliações", type=["xlsx", "csv"], key="arquivo_import"
+    )
+    tipo_padrao_import = st.selectbox(
+        "Tipo para linhas sem Tipo definido",
+        ["", "Comercial", "Técnica", "ESG"],
+        key="tipo_padrao_import",
+    )
+    if arquivo_import is not None and st.button("Validar e importar"):
+        with st.spinner("Importando avaliações..."):
+            df_import = ler_arquivo_importacao(
+                arquivo_import, arquivo_import.name, tipo_padrao_import
+            )
+            if df_import.empty:
+                st.warning("Nenhuma linha encontrada no arquivo.")
+            else:
+                try:
+                    relatorio = importar_avaliacoes(
+                        df_import, perguntas_ref, acessos, categorias_df
+                    )
+                except ErroPlanilha as e:
+                    mostrar_erro_planilha(e)
+                n_ok = int((relatorio["Status"] == "Importada").sum())
+                st.success(
+                    f"{n_ok} de {len(relatorio)} linha(s) importada(s)."
+                )
+                n_dup = int((relatorio["Status"] == "Duplicada").sum())
+                if n_dup:
+                    st.warning(
+                        f"{n_dup} linha(s) repetida(s) no arquivo foram substituídas "
+                        "pela última ocorrência da mesma chave."
+                    )
+                erros_import = relatorio[relatorio["Status"] != "Importada"]
+                if not erros_import.empty:
+                    st.dataframe(
+                        erros_import, use_container_width=True, hide_index=True
+                    )
+                st.download_button(
+                    "Baixar Relatório da Importação (CSV)",
+                    relatorio.to_csv(index=False).encode("utf-8"),
+                    file_name="relatorio_importacao.csv",
+                    mime="text/csv",
+                )
+
 # --------------------------------------------------------------------------------
 # Avaliação (usuário)
 # --------------------------------------------------------------------------------
@@ -810,7 +896,133 @@ if (
             )
         else:
             st.write(f"{f}")
-    if len(fornecedores) > 0:
+    modo_grade = (
+        st.radio(
+            "Modo de preenchimento",
+            ["Um fornecedor por vez", "Grade (vários fornecedores)"],
+            horizontal=True,
+            key="modo_preenchimento",
+        )
+        == "Grade (vários fornecedores)"
+    )
+    if len(fornecedores) > 0 and modo_grade:
+        if not checar_usuario(
+            st.session_state.email_logado,
+            tipo,
+            categoria,
+            acessos,
+        ):
+            st.error(
+                "Acesso negado! Verifique seu e-mail, categoria e tipo de avaliação."
+            )
+            st.stop()
+        perguntas = perguntas_ref.get(tipo)
+        if perguntas is None or len(perguntas) == 0:
+            st.error(
+                "Não foram encontradas perguntas para esse tipo de avaliação. Verifique a planilha de perguntas!"
+            )
+            st.stop()
+        st.markdown("---")
+        st.header(f"Avaliação {tipo} em grade ({categoria})")
+
+        # Uma leitura da aba para saber quais fornecedores já foram avaliados
+        df_respostas_tipo, _ = obter_respostas_tipo(tipo, categorias=[categoria])
+        ja_avaliados = set()
+        if not df_respostas_tipo.empty:
+            mask = (
+                df_respostas_tipo["E-mail"].astype(str).str.lower()
+                == st.session_state.email_logado.lower()
+            ) & (df_respostas_tipo["Categoria"] == categoria)
+            ja_avaliados = set(df_respostas_tipo.loc[mask, "Fornecedor"])
+        pendentes = [f for f in fornecedores if f not in ja_avaliados]
+        if len(pendentes) < len(fornecedores):
+            st.info(
+                f"{len(fornecedores) - len(pendentes)} fornecedor(es) desta categoria já avaliado(s) não aparecem na grade. Só é permitido um envio por usuário."
+            )
+        if not pendentes:
+            st.info("Todos os fornecedores desta categoria já foram avaliados.")
+        else:
+            escala_str = " • ".join(
+                [str(x).rstrip("0").rstrip(".") for x in NOTAS_COM_TEC]
+            )
+            st.markdown(
+                f"""
+                <div style="font-size: 13px;">
+                    <span style="color:#999"><b>Escala permitida:</b> {escala_str} &nbsp;&nbsp;&nbsp; <b>1</b> = Ruim &nbsp;&nbsp; <b>3</b> = Bom &nbsp;&nbsp;&nbsp; Linhas em branco não são enviadas.</span>
+                </div>""",
+                unsafe_allow_html=True,
+            )
+            colunas_q = [q for (q, _) in perguntas]
+            grade = pd.DataFrame({"Fornecedor": pendentes})
+            config_grade = {
+                "Fornecedor": st.column_config.TextColumn(
+                    "Fornecedor", disabled=True
+                )
+            }
+            for idx, (pergunta, peso) in enumerate(perguntas, 1):
+                grade[pergunta] = None
+                titulo = pergunta.split("\n")[0].strip().rstrip(":")
+                config_grade[pergunta] = st.column_config.SelectboxColumn(
+                    f"{idx}. {titulo} ({peso*100:.0f}%)",
+                    help=pergunta,
+                    options=NOTAS_COM_TEC,
+                )
+            with st.form("avaliacao_grade"):
+                grade_editada = st.data_editor(
+                    grade,
+                    column_config=config_grade,
+                    hide_index=True,
+                    use_container_width=True,
+                    key=f"grade_{tipo}_{categoria}",
+                )
+                submitted_grade = st.form_submit_button("Enviar avaliações")
+            if submitted_grade:
+                notas_grade = grade_editada[colunas_q].apply(
+                    pd.to_numeric, errors="coerce"
+                )
+                preenchidas = notas_grade.notna()
+                fora_escala = preenchidas & ~notas_grade.isin(NOTAS_COM_TEC)
+                completas = preenchidas.all(axis=1) & ~fora_escala.any(axis=1)
+                parciais = preenchidas.any(axis=1) & ~completas
+                if fora_escala.any(axis=None):
+                    st.error(
+                        "Há notas fora da escala permitida. Use apenas: "
+                        + escala_str
+                    )
+                elif parciais.any():
+                    st.error(
+                        "Preencha todas as perguntas (ou deixe a linha em branco) para: "
+                        + ", ".join(grade_editada.loc[parciais, "Fornecedor"])
+                    )
+                elif not completas.any():
+                    st.warning("Nenhum fornecedor foi preenchido na grade.")
+                else:
+                    notas_por_fornecedor = {
+                        forn: dict(zip(colunas_q, valores))
+                        for forn, valores in zip(
+                            grade_editada.loc[completas, "Fornecedor"],
+                            notas_grade.loc[completas].itertuples(
+                                index=False, name=None
+                            ),
+                        )
+                    }
+                    try:
+                        salvar_respostas_em_lote(
+                            tipo,
+                            st.session_state.email_logado,
+                            categoria,
+                            notas_por_fornecedor,
+                            perguntas,
+                        )
+                    except ErroPlanilha as e:
+                        mostrar_erro_planilha(e)
+                    st.session_state.fornecedores_responsaveis.setdefault(
+                        tipo, []
+                    ).extend(notas_por_fornecedor)
+                    st.success(
+                        f"{len(notas_por_fornecedor)} avaliação(ões) registrada(s) com sucesso!"
+                    )
+    elif len(fornecedores) > 0:
         fornecedor_selecionado = st.selectbox(
             "Selecionar Fornecedor", fornecedores, key="forn"
         )
@@ -847,7 +1059,9 @@ if (
             )
             st.stop()
         else:
-            df_respostas_tipo, _, _ = obter_df_resposta(tipo)
+            df_respostas_tipo, _ = obter_respostas_tipo(
+                tipo, categorias=[categoria]
+            )
             ja_respondeu = False
             if not df_respostas_tipo.empty:
                 mask = (
@@ -897,14 +1111,17 @@ if (
                         "Enviar avaliação"
                     )
                     if submitted:
-                        aba, df_atualizada = salvar_resposta_ponderada(
-                            tipo,
-                            st.session_state.email_logado,
-                            categoria,
-                            fornecedor_selecionado,
-                            notas,
-                            perguntas,
-                        )
+                        try:
+                            aba, df_atualizada = salvar_resposta_ponderada(
+                                tipo,
+                                st.session_state.email_logado,
+                                categoria,
+                                fornecedor_selecionado,
+                                notas,
+                                perguntas,
+                            )
+                        except ErroPlanilha as e:
+                            mostrar_erro_planilha(e)
                         st.session_state.fornecedores_responsaveis.setdefault(
                             tipo, []
                         ).append(fornecedor_selecionado)
@@ -922,44 +1139,25 @@ if (
     st.subheader("Resumo Final das Suas Avaliações")
     email = st.session_state.email_logado
     tipos = get_opcoes_tipo(email, acessos)
-    mostrou_nota = False
-    for tipo_avaliacao in tipos:
-        perguntas_tipo = perguntas_ref.get(tipo_avaliacao)
-        if not perguntas_tipo:
-            continue
-        df_tipo, _, _ = obter_df_resposta(tipo_avaliacao)
-        if df_tipo.empty or "E-mail" not in df_tipo.columns:
-            continue
-        mask_email = (
-            df_tipo["E-mail"].astype(str).str.lower()
-            == email.lower()
-        )
-        respostas_email = df_tipo[mask_email]
-        if respostas_email.empty:
-            continue
-        mostrou_nota = True
-        for _, linha in respostas_email.iterrows():
-            categoria_ = linha["Categoria"]
-            fornecedor_ = linha["Fornecedor"]
-            st.markdown(
-                f"**[{tipo_avaliacao}] | {categoria_} | {fornecedor_}**"
-            )
-            colunas_perguntas = [q for (q, _) in perguntas_tipo]
-            df_show = pd.DataFrame(
-                {
-                    "Questão": [q for (q, _) in perguntas_tipo],
-                    "Nota Atribuída": [
-                        linha[q] if q in linha else None
-                        for q in colunas_perguntas
-                    ],
-                }
-            )
-            st.dataframe(
-                df_show, use_container_width=True, hide_index=True
-            )
-            st.markdown("---")
-    if not mostrou_nota:
+    tipos_com_perguntas = [t for t in tipos if perguntas_ref.get(t)]
+    df_previa = avaliacoes_do_usuario(email, tipos_com_perguntas, perguntas_ref)
+    if df_previa.empty:
         st.info("Você ainda não realizou nenhuma avaliação.")
+    else:
+        n_paginas = (len(df_previa) - 1) // TAMANHO_PAGINA_PREVIA + 1
+        pagina_previa = 1
+        if n_paginas > 1:
+            pagina_previa = st.number_input(
+                "Página", min_value=1, max_value=n_paginas, value=1, step=1
+            )
+        ini = (pagina_previa - 1) * TAMANHO_PAGINA_PREVIA
+        fim = min(ini + TAMANHO_PAGINA_PREVIA, len(df_previa))
+        st.caption(f"Exibindo {ini + 1}–{fim} de {len(df_previa)} notas")
+        st.dataframe(
+            df_previa.iloc[ini:fim],
+            use_container_width=True,
+            hide_index=True,
+        )
     col1, col2 = st.columns([1, 1])
     with col1:
         if st.button("Voltar para Avaliação"):
@@ -0,0 +1,285 @@
+"""
+Apuração do Meli Awards em linha de comando, sem Streamlit nem Google Sheets.
+
+Lê perguntas, acessos e respostas de arquivos locais (XLSX, CSV ou Parquet)
+e gera, para cada ciclo, o Top 3 por categoria (com intervalos de confiança
+e probabilidade de Top 3 por bootstrap), a contagem de avaliações
+completas/incompletas, o progresso por atribuição (com --acessos) e as
+tabelas por tipo. Ciclos diferentes são
+apurados em paralelo, um processo por ciclo.
+
+Exemplo:
+    python apurar_premiacao.py --perguntas Perguntas.xlsx --acessos Acessos.xlsx \\
+        2024=respostas_2024.xlsx 2025=Respostas.xlsx --saida resultados
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from calculos import (
+    N_REPLICAS_BOOTSTRAP,
+    adicionar_intervalos_top3,
+    calcular_contagem,
+    calcular_progresso,
+    calcular_top3,
+    calcular_totais,
+    compactar_respostas,
+    concatenar_respostas,
+    normalizar_tipo,
+    perguntas_de_df,
+    separador_csv,
+    tabela_exibicao,
+)
+
+# --------------------------------------------------------------------------------
+# Leitura dos arquivos locais
+# --------------------------------------------------------------------------------
+def _como_texto(df):
+    """Células como texto no formato do Sheets (datas dd/mm/aaaa, vazio -> "")."""
+    def _celula(v):
+        if v is None or (isinstance(v, float) and np.isnan(v)):
+            return ""
+        if hasattr(v, "hour") and hasattr(v, "year"):
+            return v.strftime("%d/%m/%Y")
+        if hasattr(v, "hour"):
+            return v.strftime("%H:%M:%S")
+        return str(v)
+    return df.map(_celula)
+
+# Caracteres lidos para achar o separador do CSV (cabeçalho inteiro)
+AMOSTRA_SEPARADOR = 1 << 16
+
+def ler_tabela(caminho, aba=0):
+    """Lê XLSX (uma aba), CSV ou Parquet como DataFrame."""
+    sufixo = Path(caminho).suffix.lower()
+    if sufixo in (".xlsx", ".xlsm"):
+        return pd.read_excel(caminho, sheet_name=aba, dtype=object)
+    if sufixo == ".parquet":
+        return pd.read_parquet(caminho)
+    if sufixo == ".csv":
+        with open(caminho, encoding="utf-8-sig", errors="ignore") as f:
+            sep = separador_csv(f.read(AMOSTRA_SEPARADOR))
+        return pd.read_csv(
+            caminho, sep=sep, dtype=str, keep_default_na=False, encoding="utf-8-sig"
+        )
+    raise ValueError(f"Formato não suportado: {caminho}")
+
+def _ler_xlsx_como_exibido(caminho):
+    """
+    Primeira aba do XLSX com os números formatados como porcentagem no texto
+    que o Sheets exibiria (0.15 em célula "0%" -> "15%"); demais células
+    como estão.
+    """
+    pasta = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = []
+        for linha in pasta.worksheets[0].iter_rows():
+            valores = []
+            for c in linha:
+                v = c.value
+                formato = getattr(c, "number_format", None) or ""
+                if isinstance(v, (int, float)) and not isinstance(v, bool) and "%" in formato:
+                    v = f"{round(v * 100, 10):g}%"
+                valores.append(v)
+            linhas.append(valores)
+    finally:
+        pasta.close()
+    if not linhas:
+        return pd.DataFrame()
+    return pd.DataFrame(linhas[1:], columns=linhas[0], dtype=object)
+
+def ler_perguntas_arquivo(caminho):
+    """
+    Perguntas e pesos. No XLSX, pesos em células de porcentagem valem como
+    exibidos ("15%"); números sem esse formato seguem a regra do Sheets
+    (15 -> 15%).
+    """
+    if Path(caminho).suffix.lower() in (".xlsx", ".xlsm"):
+        return perguntas_de_df(_ler_xlsx_como_exibido(caminho))
+    return perguntas_de_df(ler_tabela(caminho))
+
+def ler_acessos_arquivo(caminho):
+    """Aba "Acessos" do XLSX (ou a primeira) / tabela única em CSV e Parquet."""
+    if Path(caminho).suffix.lower() in (".xlsx", ".xlsm"):
+        abas = pd.ExcelFile(caminho).sheet_names
+        return ler_tabela(caminho, "Acessos" if "Acessos" in abas else 0)
+    return ler_tabela(caminho)
+
+def ler_categorias_arquivo(caminho):
+    """Aba "Categorias" do XLSX de acessos (None se não existir) / tabela única."""
+    if Path(caminho).suffix.lower() in (".xlsx", ".xlsm"):
+        abas = pd.ExcelFile(caminho).sheet_names
+        return ler_tabela(caminho, "Categorias") if "Categorias" in abas else None
+    return ler_tabela(caminho)
+
+def ler_respostas_arquivo(caminho):
+    """
+    Respostas de um ciclo, com a coluna "Tipo".
+    - XLSX: uma aba por tipo ("Comercial", "Técnica", "Esg" ou shards como
+      "Comercial - 2025"); abas que não são de um tipo (ex.: "Consolidado")
+      são ignoradas.
+    - CSV/Parquet: tabela única com a coluna "Tipo".
+    """
+    frames = []
+    if Path(caminho).suffix.lower() in (".xlsx", ".xlsm"):
+        for aba, df in pd.read_excel(caminho, sheet_name=None, dtype=object).items():
+            tipo = normalizar_tipo(aba.split(" - ")[0])
+            if not tipo or df.empty:
+                continue
+            df = compactar_respostas(_como_texto(df))
+            df["Tipo"] = tipo
+            frames.append(df)
+    else:
+        df = _como_texto(ler_tabela(caminho).astype(object))
+        if "Tipo" not in df.columns:
+            raise ValueError(f"{caminho}: coluna 'Tipo' ausente")
+        df["Tipo"] = df["Tipo"].map(normalizar_tipo)
+        frames.append(compactar_respostas(df[df["Tipo"] != ""].copy()))
+    return concatenar_respostas(frames)
+
+# --------------------------------------------------------------------------------
+# Apuração de um ciclo
+# --------------------------------------------------------------------------------
+def apurar_ciclo(
+    ciclo, caminho, perguntas_ref, acessos, saida,
+    replicas=0, categorias=None,
+):
+    """Apura um ciclo e grava os CSVs em <saida>/<ciclo>/. Retorna um resumo."""
+    df_respostas = ler_respostas_arquivo(caminho)
+    destino = Path(saida) / ciclo
+    destino.mkdir(parents=True, exist_ok=True)
+    resumo = {"ciclo": ciclo, "registros": len(df_respostas), "arquivos": []}
+    if df_respostas.empty:
+        return resumo
+
+    total, respondidas, total_perguntas = calcular_totais(df_respostas, perguntas_ref)
+    df_respostas["Total Ponderado (recalc)"] = total
+    df_top3 = calcular_top3(df_respostas)
+    if replicas > 0 and not df_top3.empty:
+        df_top3 = adicionar_intervalos_top3(df_top3, df_respostas, n_replicas=replicas)
+    tabelas = {"top3_por_categoria": df_top3}
+    contagem, detalhes = calcular_contagem(
+        df_respostas, respondidas, total_perguntas, acessos
+    )
+    tabelas["contagem_completas_incompletas_por_email_categoria_tipo"] = (
+        contagem.sort_values(["E-mail", "Categoria", "Tipo"])
+    )
+    tabelas["detalhes_avaliacoes_incompletas"] = detalhes.sort_values(
+        ["E-mail", "Categoria", "Tipo", "Fornecedor"]
+    )
+    if acessos is not None and categorias is not None:
+        pendentes, prog_avaliador, prog_categoria = calcular_progresso(
+            df_respostas, acessos, categorias
+        )
+        tabelas["progresso_por_avaliador"] = prog_avaliador
+        tabelas["progresso_por_categoria"] = prog_categoria
+        tabelas["atribuicoes_pendentes"] = pendentes
+        resumo["pendentes"] = len(pendentes)
+    for tipo, dft in df_respostas.groupby("Tipo", observed=True):
+        tabelas[f"avaliacoes_{str(tipo).lower()}"] = tabela_exibicao(
+            dft.dropna(axis=1, how="all")
+        )
+
+    for nome, tabela in tabelas.items():
+        arquivo = destino / f"{nome}.csv"
+        tabela.to_csv(arquivo, index=False)
+        resumo["arquivos"].append(str(arquivo))
+    resumo["completas"] = int(contagem["Completas"].sum())
+    resumo["incompletas"] = int(contagem["Incompletas"].sum())
+    return resumo
+
+def _apurar(args):
+    return apurar_ciclo(*args)
+
+# --------------------------------------------------------------------------------
+# Linha de comando
+# --------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apura Top 3, contagem de avaliações e tabelas por tipo a partir de arquivos locais."
+    )
+    parser.add_argument("--perguntas", required=True, help="planilha de perguntas e pesos")
+    parser.add_argument("--acessos", help="planilha de acessos (inclui avaliadores sem resposta na contagem)")
+    parser.add_argument(
+        "--categorias",
+        help="planilha Categoria × fornecedor (padrão: aba Categorias do arquivo de acessos); com --acessos, gera o progresso por atribuição",
+    )
+    parser.add_argument("--saida", default="resultados", help="pasta de saída (padrão: resultados)")
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="máximo de ciclos apurados em paralelo (padrão: nº de CPUs)",
+    )
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        default=0,
+        help=(
+            "réplicas do bootstrap do Top 3 (padrão: 0, desligado; "
+            f"sugerido: {N_REPLICAS_BOOTSTRAP})"
+        ),
+    )
+    parser.add_argument(
+        "respostas",
+        nargs="+",
+        help="arquivo de respostas de cada ciclo, como CICLO=ARQUIVO ou só ARQUIVO (ciclo = nome do arquivo)",
+    )
+    args = parser.parse_args(argv)
+
+    perguntas_ref = ler_perguntas_arquivo(args.perguntas)
+    acessos = ler_acessos_arquivo(args.acessos) if args.acessos else None
+    categorias = None
+    if args.categorias:
+        categorias = ler_categorias_arquivo(args.categorias)
+        if categorias is None:
+            parser.error(f"--categorias: {args.categorias} não tem a aba Categorias")
+    elif args.acessos:
+        # Só um XLSX de acessos pode trazer as categorias (aba Categorias);
+        # CSV/Parquet são a própria tabela de Acessos
+        if Path(args.acessos).suffix.lower() in (".xlsx", ".xlsm"):
+            categorias = ler_categorias_arquivo(args.acessos)
+        if categorias is None:
+            print(
+                f"Aviso: {args.acessos} não é um XLSX com a aba Categorias; o "
+                "progresso por atribuição não será gerado (informe --categorias).",
+                file=sys.stderr,
+            )
+    tarefas = []
+    for item in args.respostas:
+        ciclo, _, caminho = item.rpartition("=")
+        ciclo = ciclo or Path(caminho).stem
+        tarefas.append(
+            (ciclo, caminho, perguntas_ref, acessos, args.saida, args.replicas, categorias)
+        )
+
+    n_processos = max(1, min(args.processos, len(tarefas)))
+    if n_processos == 1:
+        resumos = [_apurar(t) for t in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=n_processos) as executor:
+            resumos = list(executor.map(_apurar, tarefas))
+
+    for resumo in resumos:
+        print(
+            f"[{resumo['ciclo']}] {resumo['registros']} registro(s); "
+            f"completas: {resumo.get('completas', 0)}, "
+            f"incompletas: {resumo.get('incompletas', 0)}"
+            + (
+                f", atribuições pendentes: {resumo['pendentes']}"
+                if "pendentes" in resumo
+                else ""
+            )
+        )
+        for arquivo in resumo["arquivos"]:
+            print(f"  {arquivo}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,724 @@
+"""
+Cálculos do Meli Awards sem dependência do Streamlit nem do Google Sheets.
+
+Usado pelo app (appMeliAwards.py) e pela apuração em linha de comando
+(apurar_premiacao.py): leitura das perguntas, representação compacta das
+respostas, esquema de colunas das abas, totais ponderados, Top 3 e
+contagem de avaliações completas/incompletas.
+"""
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+TIPOS_LOGICOS = ["Comercial", "Técnica", "ESG"]
+
+# --------------------------------------------------------------------------------
+# Funções utilitárias de numérico
+# --------------------------------------------------------------------------------
+def to_number(value):
+    """Converte textos como '2,7' ou '2.7' para float 2.7; vazio -> NaN."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return np.nan
+    s = str(value).strip()
+    if s == "":
+        return np.nan
+    s = s.replace(",", ".")
+    try:
+        return float(s)
+    except Exception:
+        return np.nan
+
+def normalizar_tipo(valor):
+    """'comercial' -> 'Comercial', 'tecnica'/'Técnica' -> 'Técnica', 'Esg' -> 'ESG'."""
+    t = str(valor or "").strip().lower()
+    if t == "esg":
+        return "ESG"
+    if t in ("técnica", "tecnica"):
+        return "Técnica"
+    if t == "comercial":
+        return "Comercial"
+    return ""
+
+def separador_csv(amostra):
+    """
+    Separador (";" ou ",") de um CSV pelo registro de cabeçalho: conta os
+    dois fora de aspas até a primeira quebra de linha fora de aspas, então
+    cabeçalhos com quebra de linha dentro do campo (o texto das perguntas)
+    não cortam a contagem.
+    """
+    contagem = {";": 0, ",": 0}
+    entre_aspas = False
+    for c in amostra:
+        if c == '"':
+            entre_aspas = not entre_aspas
+        elif not entre_aspas:
+            if c in "\r\n":
+                break
+            if c in contagem:
+                contagem[c] += 1
+    return ";" if contagem[";"] > contagem[","] else ","
+
+# --------------------------------------------------------------------------------
+# Perguntas e pesos
+# --------------------------------------------------------------------------------
+def _converter_peso(valor):
+    """'15%' / '15' / 15 -> 0.15 (peso como o Sheets exibe, em porcentagem)."""
+    try:
+        return float(str(valor).replace(",", ".").replace("%", "").strip()) / 100.0
+    except Exception:
+        return 0.0
+
+def perguntas_de_df(df):
+    """
+    Monta {tipo: [(pergunta, peso)]} a partir da planilha de perguntas
+    (colunas <Tipo> e Peso_<Tipo>). Perguntas vazias ou com peso zero
+    são ignoradas.
+    """
+    perguntas = {t: [] for t in TIPOS_LOGICOS}
+    for tipo in TIPOS_LOGICOS:
+        col_pergunta = tipo
+        col_peso = f"Peso_{tipo}"
+        if col_pergunta in df.columns and col_peso in df.columns:
+            for pergunta, peso in zip(df[col_pergunta], df[col_peso]):
+                pergunta = str(pergunta).strip()
+                peso = _converter_peso(peso)
+                if pergunta and pergunta.lower() != "nan" and peso > 0:
+                    perguntas[tipo].append((pergunta, peso))
+    return perguntas
+
+# --------------------------------------------------------------------------------
+# Representação compacta das respostas
+# --------------------------------------------------------------------------------
+# Colunas de texto repetitivo: guardadas como category (um código por linha)
+COLUNAS_CATEGORICAS = ["Hora", "E-mail", "Categoria", "Fornecedor", "Tipo"]
+
+def converter_notas(serie):
+    """Versão vetorizada de to_number para uma coluna inteira (float32)."""
+    texto = serie.astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").astype("float32")
+
+def compactar_respostas(df):
+    """
+    Tipos compactos para as respostas: colunas-chave como category,
+    "Data" como datetime (dd/mm/aaaa) e notas como float32.
+    Opera por posição, o que tolera cabeçalhos repetidos na planilha.
+    """
+    for i, col in enumerate(df.columns):
+        serie = df.iloc[:, i]
+        if col == "Data":
+            df.isetitem(
+                i, pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+            )
+        elif col in COLUNAS_CATEGORICAS:
+            df.isetitem(i, serie.astype(str).astype("category"))
+        else:
+            df.isetitem(i, converter_notas(serie))
+    return df
+
+# Casas decimais das notas ao voltar de float32 para float64 (2.7f -> 2.7)
+CASAS_DECIMAIS = 6
+
+def notas_float64(matriz):
+    """Matriz de notas float32 como float64, sem o ruído da conversão."""
+    return np.round(np.asarray(matriz, dtype=float), CASAS_DECIMAIS)
+
+def tabela_exibicao(df):
+    """
+    Cópia das respostas para exibir ou exportar em CSV: notas float32 como
+    float64 arredondado e "Data" de volta a dd/mm/aaaa.
+    """
+    out = df.copy()
+    for i in range(out.shape[1]):
+        serie = out.iloc[:, i]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            out.isetitem(i, serie.dt.strftime("%d/%m/%Y").fillna(""))
+        elif serie.dtype == np.float32:
+            out.isetitem(i, notas_float64(serie.to_numpy()))
+    return out
+
+def concatenar_respostas(frames):
+    """Concatena DataFrames de respostas mantendo as colunas category."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    # Unifica as categorias antes do concat para não perder o tipo category
+    for col in COLUNAS_CATEGORICAS:
+        if all(col in f.columns for f in frames):
+            categorias = union_categoricals(
+                [f[col].astype("category") for f in frames],
+                sort_categories=True,
+            ).categories
+            for f in frames:
+                f[col] = pd.Categorical(f[col], categories=categorias)
+    return pd.concat(frames, ignore_index=True)
+
+def relatorio_memoria(df):
+    """Uso de memória por coluna (bytes, incluindo o conteúdo dos textos)."""
+    uso = df.memory_usage(deep=True, index=False)
+    rel = pd.DataFrame(
+        {
+            "Coluna": uso.index,
+            "Tipo de dado": [str(t) for t in df.dtypes],
+            "Bytes": uso.to_numpy(),
+        }
+    )
+    total = pd.DataFrame(
+        [{"Coluna": "TOTAL", "Tipo de dado": "", "Bytes": int(uso.sum())}]
+    )
+    return pd.concat([rel, total], ignore_index=True)
+
+def versao_dados(df_respostas, perguntas_ref, *extras):
+    """
+    Chave de versão dos dados: nº de linhas e hash do conteúdo das respostas,
+    das perguntas/pesos e de tabelas extras (ex.: Acessos, Categorias).
+    Muda sempre que qualquer uma delas muda; serve de chave de cache.
+    Respostas com attrs["versoes"] (versões das abas no cache de respostas)
+    entram pelas versões, sem percorrer as linhas a cada rerun.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    versoes = df_respostas.attrs.get("versoes")
+    if versoes is not None:
+        h.update(repr(sorted(versoes.items())).encode())
+        tabelas = extras
+    else:
+        tabelas = (df_respostas, *extras)
+    for df in tabelas:
+        if df is None:
+            h.update(b"-")
+            continue
+        h.update(repr((df.shape, [str(c) for c in df.columns])).encode())
+        if len(df):
+            h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(repr(sorted(perguntas_ref.items())).encode())
+    return f"{len(df_respostas)}-{h.hexdigest()}"
+
+# --------------------------------------------------------------------------------
+# Esquema das abas de respostas (posição de cada coluna por aba)
+# --------------------------------------------------------------------------------
+COLUNAS_FIXAS = ["Data", "Hora", "E-mail", "Categoria", "Fornecedor"]
+SUFIXO_PONDERADA = " (PONDERADA)"
+
+@lru_cache(maxsize=64)
+def _montar_esquema(perguntas, headers):
+    colunas_perguntas = [q for (q, p) in perguntas]
+    colunas_ponderada = [q + SUFIXO_PONDERADA for q in colunas_perguntas]
+    esperadas = COLUNAS_FIXAS + colunas_perguntas + colunas_ponderada
+
+    # Cabeçalho final: o da planilha (ordem/nome preservados) + faltantes ao fim
+    finais = list(headers) if headers else list(esperadas)
+    faltantes = [c for c in esperadas if c not in finais]
+    finais += faltantes
+    pos = {}
+    for i, col in enumerate(finais):
+        pos.setdefault(col, i)
+
+    vistos, duplicadas = set(), []
+    for col in headers:
+        if col in vistos and col not in duplicadas:
+            duplicadas.append(col)
+        vistos.add(col)
+    extras = [c for c in headers if c not in set(esperadas) | {"Tipo"}]
+
+    return {
+        "headers": tuple(finais),
+        "n_existentes": len(headers),
+        "cabecalho_alterado": not headers or bool(faltantes),
+        "pos": pos,
+        "pos_fixas": np.array([pos[c] for c in COLUNAS_FIXAS]),
+        "pos_perguntas": np.array([pos[c] for c in colunas_perguntas], dtype=int),
+        "pos_ponderadas": np.array([pos[c] for c in colunas_ponderada], dtype=int),
+        "pesos": np.array([p for (q, p) in perguntas], dtype=float),
+        "faltantes": tuple(faltantes) if headers else (),
+        "extras": tuple(extras),
+        "duplicadas": tuple(duplicadas),
+        "drift": bool(headers) and bool(faltantes or extras or duplicadas),
+    }
+
+def esquema_aba(perguntas, headers):
+    """
+    Esquema de uma aba para a versão atual das perguntas e dos cabeçalhos.
+    Montado uma vez por combinação (perguntas, headers) e reaproveitado;
+    o dicionário devolvido é compartilhado e não deve ser alterado.
+    - headers: cabeçalho final (o da planilha + colunas faltantes ao fim)
+    - pos_fixas / pos_perguntas / pos_ponderadas: posições nesse cabeçalho
+    - faltantes / extras / duplicadas / drift: divergências do cabeçalho
+      da planilha em relação às perguntas atuais
+    """
+    return _montar_esquema(
+        tuple((q, float(p)) for (q, p) in perguntas), tuple(headers or ())
+    )
+
+def posicoes_leitura(esquema, posicoes):
+    """Posições válidas no DataFrame lido da planilha (-1 = coluna ainda não existe)."""
+    return np.where(posicoes < esquema["n_existentes"], posicoes, -1)
+
+def matriz_notas(df, posicoes):
+    """Notas das colunas nas posições indicadas, como matriz float (-1 -> NaN)."""
+    matriz = np.full((len(df), len(posicoes)), np.nan, dtype=np.float32)
+    validas = posicoes >= 0
+    if validas.any():
+        matriz[:, validas] = (
+            df.iloc[:, posicoes[validas]]
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=np.float32, na_value=np.nan)
+        )
+    return matriz
+
+def descrever_drift(esquema):
+    """Texto curto com as divergências de cabeçalho (vazio se não houver)."""
+    partes = []
+    for chave, rotulo in (
+        ("faltantes", "colunas faltando"),
+        ("extras", "colunas sem pergunta correspondente"),
+        ("duplicadas", "colunas repetidas"),
+    ):
+        if esquema[chave]:
+            nomes = ", ".join(c.splitlines()[0] for c in esquema[chave])
+            partes.append(f"{rotulo}: {nomes}")
+    return "; ".join(partes)
+
+# --------------------------------------------------------------------------------
+# Apuração: totais, Top 3 e contagem de avaliações
+# --------------------------------------------------------------------------------
+COLUNAS_TOP3 = ["Categoria", "Fornecedor", "Comercial", "Técnica", "ESG", "Nota Final"]
+
+def calcular_totais(df_respostas, perguntas_ref):
+    """
+    Total ponderado e perguntas respondidas por linha, lendo as notas por
+    posição de coluna (um esquema por tipo).
+    Retorna (total, respondidas, total_perguntas) como arrays.
+    """
+    colunas_df = list(df_respostas.columns)
+    tipos_linha = df_respostas["Tipo"].astype(str).str.strip().to_numpy()
+    total = np.zeros(len(df_respostas))
+    respondidas = np.zeros(len(df_respostas), dtype=int)
+    total_perguntas = np.zeros(len(df_respostas), dtype=int)
+    for tipo_nome, lista_q in perguntas_ref.items():
+        mask_tipo = tipos_linha == tipo_nome
+        if not mask_tipo.any():
+            continue
+        esquema = esquema_aba(lista_q, colunas_df)
+        notas = matriz_notas(
+            df_respostas[mask_tipo],
+            posicoes_leitura(esquema, esquema["pos_perguntas"]),
+        )
+        notas = notas_float64(notas)
+        total[mask_tipo] = np.nansum(notas * esquema["pesos"], axis=1)
+        respondidas[mask_tipo] = (~np.isnan(notas)).sum(axis=1)
+        total_perguntas[mask_tipo] = len(lista_q)
+    return total, respondidas, total_perguntas
+
+def calcular_notas_finais(df_respostas):
+    """
+    Média do "Total Ponderado (recalc)" por (Categoria, Fornecedor, Tipo),
+    pivotada por tipo, e Nota Final = (Comercial + Técnica + ESG) / 3.
+    """
+    base = df_respostas[
+        ["Categoria", "Fornecedor", "Tipo", "Total Ponderado (recalc)"]
+    ].dropna(subset=["Categoria", "Fornecedor", "Tipo"]).copy()
+    base["Tipo"] = base["Tipo"].astype(str).str.strip()
+    tipo_media = (
+        base.groupby(
+            ["Categoria", "Fornecedor", "Tipo"], as_index=False, observed=True
+        )["Total Ponderado (recalc)"]
+        .mean()
+        .rename(columns={"Total Ponderado (recalc)": "Média por Tipo"})
+    )
+    pivot = tipo_media.pivot_table(
+        index=["Categoria", "Fornecedor"],
+        columns="Tipo",
+        values="Média por Tipo",
+        aggfunc="first",
+        observed=True,
+    ).reset_index()
+    pivot.columns.name = None
+    for t in TIPOS_LOGICOS:
+        if t not in pivot.columns:
+            pivot[t] = 0.0
+    pivot["Nota Final"] = (
+        pivot["Comercial"].fillna(0)
+        + pivot["Técnica"].fillna(0)
+        + pivot["ESG"].fillna(0)
+    ) / 3.0
+    colunas_notas = TIPOS_LOGICOS + ["Nota Final"]
+    pivot[colunas_notas] = pivot[colunas_notas].round(CASAS_DECIMAIS)
+    return pivot
+
+def ordenar_ranking(df):
+    """
+    Ordem do ranking: por Categoria e, dentro dela, Nota Final decrescente
+    (arredondada a CASAS_DECIMAIS, para o empate não depender de resíduo de
+    ponto flutuante) com empate decidido pelo Fornecedor em ordem alfabética.
+    É a ordem do Top 3 e das posições da simulação de pesos.
+    """
+    chave = pd.DataFrame(
+        {
+            "Categoria": df["Categoria"].to_numpy(),
+            "Nota": df["Nota Final"].astype(float).round(CASAS_DECIMAIS).to_numpy(),
+            "Fornecedor": df["Fornecedor"].astype(str).to_numpy(),
+        }
+    )
+    if isinstance(df["Categoria"].dtype, pd.CategoricalDtype):
+        chave["Categoria"] = chave["Categoria"].astype(df["Categoria"].dtype)
+    ordem = chave.sort_values(
+        ["Categoria", "Nota", "Fornecedor"], ascending=[True, False, True], kind="stable"
+    ).index
+    return df.iloc[ordem]
+
+def calcular_top3(df_respostas):
+    """Três maiores Notas Finais de cada categoria (vazio se não houver dados)."""
+    pivot = calcular_notas_finais(df_respostas)
+    if pivot.empty:
+        return pd.DataFrame(columns=COLUNAS_TOP3)
+    return (
+        ordenar_ranking(pivot)
+        .groupby("Categoria", observed=True, sort=False)
+        .head(3)[COLUNAS_TOP3]
+        .reset_index(drop=True)
+    )
+
+# --------------------------------------------------------------------------------
+# Simulação de pesos (what-if)
+# --------------------------------------------------------------------------------
+def base_simulacao_pesos(df_respostas, perguntas_ref):
+    """
+    Pré-agrega as notas para simular pesos. O total de cada linha é linear
+    nos pesos (nota vazia conta 0, como em calcular_totais), logo a média
+    do total por (Categoria, Fornecedor, Tipo) = médias das notas @ pesos.
+    Retorna {"fornecedores": DataFrame(Categoria, Fornecedor),
+    "medias": {tipo: matriz fornecedores × perguntas}}.
+    """
+    base = df_respostas.dropna(subset=["Categoria", "Fornecedor", "Tipo"])
+    chave = pd.MultiIndex.from_arrays(
+        [base["Categoria"].astype(str), base["Fornecedor"].astype(str)]
+    )
+    codigos, unicos = pd.factorize(chave, sort=True)
+    fornecedores = unicos.to_frame(index=False, name=["Categoria", "Fornecedor"])
+    n_forn = len(fornecedores)
+    tipos_linha = base["Tipo"].astype(str).str.strip().to_numpy()
+    colunas_df = list(base.columns)
+    medias = {}
+    for tipo_nome, lista_q in perguntas_ref.items():
+        mask = tipos_linha == tipo_nome
+        esquema = esquema_aba(lista_q, colunas_df)
+        notas = np.nan_to_num(
+            notas_float64(
+                matriz_notas(base[mask], posicoes_leitura(esquema, esquema["pos_perguntas"]))
+            )
+        )
+        somas = np.zeros((n_forn, len(lista_q)))
+        if mask.any():
+            agrupadas = pd.DataFrame(notas).groupby(codigos[mask]).sum()
+            somas[agrupadas.index.to_numpy()] = agrupadas.to_numpy()
+        contagem = np.bincount(codigos[mask], minlength=n_forn)
+        medias[tipo_nome] = somas / np.maximum(contagem, 1)[:, None]
+    return {"fornecedores": fornecedores, "medias": medias}
+
+def simular_pesos(base, pesos_por_tipo):
+    """
+    Nota Final e posição na categoria para os pesos informados
+    ({tipo: sequência de pesos na ordem de perguntas_ref}): um produto
+    matriz-vetor por tipo sobre a base de base_simulacao_pesos.
+    """
+    resultado = base["fornecedores"].copy()
+    nota_final = np.zeros(len(resultado))
+    for tipo_nome in TIPOS_LOGICOS:
+        medias = base["medias"].get(tipo_nome)
+        if medias is None:
+            continue
+        media_tipo = medias @ np.asarray(pesos_por_tipo[tipo_nome], dtype=float)
+        nota_final += media_tipo
+    resultado["Nota Final"] = nota_final / 3.0
+    # Mesma ordem (e desempate) do Top 3
+    resultado["Posição"] = (
+        ordenar_ranking(resultado).groupby("Categoria", sort=False).cumcount() + 1
+    )
+    return resultado
+
+def comparar_pesos(base, pesos_oficiais, pesos_simulados, apenas_top=3):
+    """
+    Ranking oficial × simulado por categoria. "Movimento" > 0 indica que o
+    fornecedor subiu com os pesos simulados. Com `apenas_top`, mantém só quem
+    está entre os N primeiros em algum dos dois cenários.
+    """
+    chave = ["Categoria", "Fornecedor"]
+    oficial = simular_pesos(base, pesos_oficiais)
+    simulado = simular_pesos(base, pesos_simulados)
+    comp = oficial.merge(simulado, on=chave, suffixes=(" Oficial", " Simulada"))
+    comp["Movimento"] = comp["Posição Oficial"] - comp["Posição Simulada"]
+    if apenas_top:
+        comp = comp[
+            (comp["Posição Oficial"] <= apenas_top)
+            | (comp["Posição Simulada"] <= apenas_top)
+        ]
+    colunas = chave + [
+        "Posição Oficial", "Posição Simulada", "Movimento",
+        "Nota Final Oficial", "Nota Final Simulada",
+    ]
+    return comp.sort_values(["Categoria", "Posição Simulada"])[colunas].reset_index(drop=True)
+
+def calcular_contagem(df_respostas, respondidas, total_perguntas, acessos=None):
+    """
+    Avaliações completas/incompletas por (E-mail, Categoria, Tipo) e o
+    detalhe das incompletas por fornecedor.
+    Com `acessos` (E-mail, Avaliação, Categoria nas três primeiras colunas),
+    avaliadores com acesso e nenhuma resposta também aparecem, com zero.
+    Retorna (contagem, detalhes_incompletas).
+    """
+    tmp = df_respostas.copy()
+    tmp["Respondidas"] = respondidas
+    tmp["TotalPerguntas"] = total_perguntas
+    tmp["Completa?"] = (tmp["TotalPerguntas"] > 0) & (
+        tmp["Respondidas"] == tmp["TotalPerguntas"]
+    )
+    chave = ["E-mail", "Categoria", "Tipo"]
+    completos = (
+        tmp[tmp["Completa?"]]
+        .groupby(chave, as_index=False, observed=True)["Fornecedor"]
+        .nunique()
+        .rename(columns={"Fornecedor": "Completas"})
+    )
+    incompletos = (
+        tmp[~tmp["Completa?"]]
+        .groupby(chave, as_index=False, observed=True)["Fornecedor"]
+        .nunique()
+        .rename(columns={"Fornecedor": "Incompletas"})
+    )
+    contagem = pd.merge(completos, incompletos, on=chave, how="outer")
+    if acessos is not None and not acessos.empty:
+        esperados = pd.DataFrame(
+            {
+                "E-mail": acessos.iloc[:, 0].fillna("").astype(str).str.strip(),
+                "Categoria": acessos.iloc[:, 2].fillna("").astype(str).str.strip(),
+                "Tipo": acessos.iloc[:, 1].map(normalizar_tipo),
+            }
+        )
+        esperados = esperados[(esperados["Tipo"] != "") & (esperados["E-mail"] != "")]
+        respondidos = set(
+            zip(
+                contagem["E-mail"].astype(str).str.lower(),
+                contagem["Categoria"].astype(str),
+                contagem["Tipo"].astype(str),
+            )
+        )
+        sem_resposta = [
+            (e.lower(), c, t) not in respondidos
+            for e, c, t in esperados.itertuples(index=False, name=None)
+        ]
+        esperados = esperados[sem_resposta].drop_duplicates()
+        contagem = pd.concat(
+            [contagem.astype({c: object for c in chave}), esperados],
+            ignore_index=True,
+        )
+    contagem = contagem.fillna({"Completas": 0, "Incompletas": 0})
+    for c in ["Completas", "Incompletas"]:
+        contagem[c] = contagem[c].astype(int)
+    contagem["Total Fornecedores Avaliados"] = (
+        contagem["Completas"] + contagem["Incompletas"]
+    )
+    detalhes_incompletas = tmp[~tmp["Completa?"]][
+        ["E-mail", "Categoria", "Tipo", "Fornecedor", "Respondidas", "TotalPerguntas"]
+    ].copy()
+    return contagem, detalhes_incompletas
+
+# --------------------------------------------------------------------------------
+# Progresso por atribuição (Acessos × Categorias)
+# --------------------------------------------------------------------------------
+CHAVE_ATRIBUICAO = ["E-mail", "Tipo", "Categoria", "Fornecedor"]
+
+def _texto_limpo(serie):
+    return serie.fillna("").astype(str).str.strip()
+
+def atribuicoes_esperadas(acessos, categorias):
+    """
+    Expande as atribuições (E-mail, Tipo, Categoria, Fornecedor): cada linha
+    de Acessos (E-mail, Avaliação, Categoria nas três primeiras colunas)
+    recebe todos os fornecedores da categoria em Categorias (Categoria,
+    Razão Social nas duas primeiras colunas). E-mails em minúsculas.
+    """
+    if acessos is None or categorias is None or acessos.empty or categorias.empty:
+        return pd.DataFrame(columns=CHAVE_ATRIBUICAO)
+    acc = pd.DataFrame(
+        {
+            "E-mail": _texto_limpo(acessos.iloc[:, 0]).str.lower(),
+            "Tipo": acessos.iloc[:, 1].map(normalizar_tipo),
+            "Categoria": _texto_limpo(acessos.iloc[:, 2]),
+        }
+    )
+    acc = acc[(acc["E-mail"] != "") & (acc["Tipo"] != "") & (acc["Categoria"] != "")]
+    cat = pd.DataFrame(
+        {
+            "Categoria": _texto_limpo(categorias.iloc[:, 0]),
+            "Fornecedor": _texto_limpo(categorias.iloc[:, 1]),
+        }
+    )
+    cat = cat[(cat["Categoria"] != "") & (cat["Fornecedor"] != "")]
+    esperadas = acc.drop_duplicates().merge(cat.drop_duplicates(), on="Categoria")
+    return esperadas[CHAVE_ATRIBUICAO].reset_index(drop=True)
+
+def calcular_progresso(df_respostas, acessos, categorias):
+    """
+    Compara as atribuições esperadas com as chaves já enviadas nas abas de
+    respostas (junção por hash em E-mail sem diferenciar maiúsculas, Tipo,
+    Categoria e Fornecedor). Também conta fornecedores nunca iniciados.
+    Retorna (pendentes, por_avaliador, por_categoria):
+      - pendentes: atribuições sem nenhuma resposta
+      - por_avaliador: (E-mail, Tipo) com Esperadas, Enviadas, Pendentes e
+        Progresso (%)
+      - por_categoria: (Categoria, Tipo) com as mesmas colunas
+    """
+    esperadas = atribuicoes_esperadas(acessos, categorias)
+    if df_respostas is not None and not df_respostas.empty:
+        enviadas = pd.DataFrame(
+            {
+                "E-mail": _texto_limpo(df_respostas["E-mail"]).str.lower(),
+                "Tipo": _texto_limpo(df_respostas["Tipo"]),
+                "Categoria": _texto_limpo(df_respostas["Categoria"]),
+                "Fornecedor": _texto_limpo(df_respostas["Fornecedor"]),
+            }
+        ).drop_duplicates()
+    else:
+        enviadas = pd.DataFrame(columns=CHAVE_ATRIBUICAO, dtype=str)
+    enviada = (
+        esperadas.merge(enviadas, on=CHAVE_ATRIBUICAO, how="left", indicator=True)["_merge"]
+        == "both"
+    ).to_numpy()
+    esperadas["Enviada"] = enviada.astype(int)
+
+    def _resumo(por):
+        resumo = (
+            esperadas.groupby(por, as_index=False, sort=True)
+            .agg(Esperadas=("Enviada", "size"), Enviadas=("Enviada", "sum"))
+        )
+        resumo["Pendentes"] = resumo["Esperadas"] - resumo["Enviadas"]
+        resumo["Progresso (%)"] = (
+            100.0 * resumo["Enviadas"] / resumo["Esperadas"].where(resumo["Esperadas"] > 0)
+        ).round(1)
+        return resumo
+
+    pendentes = (
+        esperadas.loc[~enviada, CHAVE_ATRIBUICAO]
+        .sort_values(CHAVE_ATRIBUICAO)
+        .reset_index(drop=True)
+    )
+    return pendentes, _resumo(["E-mail", "Tipo"]), _resumo(["Categoria", "Tipo"])
+
+# --------------------------------------------------------------------------------
+# Estabilidade do ranking: intervalos de confiança por bootstrap
+# --------------------------------------------------------------------------------
+N_REPLICAS_BOOTSTRAP = 10000
+# Memória por lote de réplicas: sorteios, índices e valores sorteados são
+# matrizes (réplicas x avaliações) de 8 bytes, e o lote se ajusta ao volume
+MEMORIA_LOTE_BOOTSTRAP = 64 * 1024 * 1024
+MATRIZES_POR_LOTE = 4
+
+def replicas_por_lote(n_avaliacoes):
+    """Réplicas sorteadas por vez sem passar de MEMORIA_LOTE_BOOTSTRAP."""
+    return max(1, MEMORIA_LOTE_BOOTSTRAP // (max(n_avaliacoes, 1) * 8 * MATRIZES_POR_LOTE))
+
+def bootstrap_notas_finais(
+    df_respostas, n_replicas=N_REPLICAS_BOOTSTRAP, nivel=0.95, semente=0
+):
+    """
+    Bootstrap da Nota Final de todos os (Categoria, Fornecedor) de uma vez.
+    Em cada réplica, as avaliações de cada (Categoria, Fornecedor, Tipo) são
+    reamostradas com reposição e a Nota Final é recalculada como em
+    calcular_notas_finais (tipo sem avaliação conta 0). Os sorteios são
+    feitos em lotes de réplicas com NumPy, sem laço por fornecedor, e o
+    ranking de cada réplica é calculado dentro da categoria, com empates
+    desfeitos por sorteio.
+    Retorna, por fornecedor: Avaliações, IC inferior/superior da Nota
+    Final, P(Top 3) e P(1º lugar).
+    """
+    base = df_respostas[
+        ["Categoria", "Fornecedor", "Tipo", "Total Ponderado (recalc)"]
+    ].dropna(subset=["Categoria", "Fornecedor", "Tipo"])
+    base = base.assign(
+        Categoria=base["Categoria"].astype(str),
+        Fornecedor=base["Fornecedor"].astype(str),
+        Tipo=base["Tipo"].astype(str).str.strip(),
+    )
+    base = base[base["Tipo"].isin(TIPOS_LOGICOS)]
+    rotulo_inf = f"IC {nivel:.0%} Inferior"
+    rotulo_sup = f"IC {nivel:.0%} Superior"
+    colunas = ["Categoria", "Fornecedor", "Avaliações", rotulo_inf, rotulo_sup, "P(Top 3)", "P(1º lugar)"]
+    if base.empty or n_replicas <= 0:
+        return pd.DataFrame(columns=colunas)
+
+    # Fornecedores ordenados por categoria; grupos (fornecedor, tipo) contíguos
+    fornecedores = (
+        base[["Categoria", "Fornecedor"]]
+        .drop_duplicates()
+        .sort_values(["Categoria", "Fornecedor"])
+        .reset_index(drop=True)
+    )
+    idx_forn = pd.MultiIndex.from_frame(fornecedores).get_indexer(
+        pd.MultiIndex.from_frame(base[["Categoria", "Fornecedor"]])
+    )
+    idx_tipo = base["Tipo"].map({t: i for i, t in enumerate(TIPOS_LOGICOS)}).to_numpy()
+    ordem = np.lexsort((idx_tipo, idx_forn))
+    valores = base["Total Ponderado (recalc)"].to_numpy(dtype=float)[ordem]
+    grupo = idx_forn[ordem] * len(TIPOS_LOGICOS) + idx_tipo[ordem]
+    inicio_grupo = np.flatnonzero(np.r_[True, grupo[1:] != grupo[:-1]])
+    tamanho_grupo = np.diff(np.r_[inicio_grupo, len(grupo)])
+    id_grupo = grupo[inicio_grupo]
+    forn_grupo, tipo_grupo = np.divmod(id_grupo, len(TIPOS_LOGICOS))
+    # Para cada amostra sorteada: início e tamanho do seu grupo
+    ini_amostra = np.repeat(inicio_grupo, tamanho_grupo)
+    tam_amostra = np.repeat(tamanho_grupo, tamanho_grupo)
+
+    n_forn = len(fornecedores)
+    cat_codigos = pd.factorize(fornecedores["Categoria"])[0]
+    inicio_cat = np.r_[0, np.flatnonzero(cat_codigos[1:] != cat_codigos[:-1]) + 1]
+    inicio_cat_pos = np.repeat(inicio_cat, np.diff(np.r_[inicio_cat, n_forn]))
+
+    rng = np.random.default_rng(semente)
+    notas = np.empty((n_replicas, n_forn))
+    top3 = np.zeros(n_forn)
+    primeiro = np.zeros(n_forn)
+    lote = replicas_por_lote(len(valores))
+    for ini in range(0, n_replicas, lote):
+        b = min(lote, n_replicas - ini)
+        sorteio = ini_amostra + (rng.random((b, len(valores))) * tam_amostra).astype(np.int64)
+        medias = np.add.reduceat(valores[sorteio], inicio_grupo, axis=1) / tamanho_grupo
+        por_tipo = np.zeros((b, n_forn, len(TIPOS_LOGICOS)))
+        por_tipo[:, forn_grupo, tipo_grupo] = medias
+        nota_final = por_tipo.sum(axis=2) / 3.0
+        notas[ini:ini + b] = nota_final
+
+        # Posição dentro da categoria: ordena por (categoria, -nota) por réplica.
+        # A nota é arredondada como em ordenar_ranking e os empates são
+        # desfeitos por sorteio, para que o crédito se divida entre empatados.
+        desempate = rng.random((b, n_forn))
+        nota_arred = np.round(nota_final, CASAS_DECIMAIS)
+        ordem_rep = np.lexsort(
+            (desempate, -nota_arred, np.broadcast_to(cat_codigos, (b, n_forn))), axis=1
+        )
+        posicao = np.empty_like(ordem_rep)
+        np.put_along_axis(
+            posicao, ordem_rep, np.arange(n_forn)[None, :] - inicio_cat_pos[None, :], axis=1
+        )
+        top3 += (posicao < 3).sum(axis=0)
+        primeiro += (posicao == 0).sum(axis=0)
+
+    alfa = (1.0 - nivel) / 2.0
+    limites = np.quantile(notas, [alfa, 1.0 - alfa], axis=0)
+    resultado = fornecedores.copy()
+    resultado["Avaliações"] = np.bincount(forn_grupo, weights=tamanho_grupo, minlength=n_forn).astype(int)
+    resultado[rotulo_inf] = np.round(limites[0], CASAS_DECIMAIS)
+    resultado[rotulo_sup] = np.round(limites[1], CASAS_DECIMAIS)
+    resultado["P(Top 3)"] = top3 / n_replicas
+    resultado["P(1º lugar)"] = primeiro / n_replicas
+    return resultado[colunas]
+
+def adicionar_intervalos_top3(df_top3, df_respostas, **kwargs):
+    """Junta ao Top 3 as colunas de bootstrap_notas_finais."""
+    estat = bootstrap_notas_finais(df_respostas, **kwargs)
+    chave = ["Categoria", "Fornecedor"]
+    top3 = df_top3.astype({c: str for c in chave})
+    return top3.merge(estat, on=chave, how="left")
@@ -0,0 +1,819 @@
+"""
+Acesso às planilhas do Meli Awards no Google Sheets: perguntas, acessos e
+respostas (leitura com cache compartilhado, shards por ciclo, upsert em
+lote e índice por usuário).
+
+Separado da interface (appMeliAwards.py) para poder ser usado sem a
+página, por exemplo pelo teste de carga (teste_carga.py) e pelos testes:
+não depende do Streamlit. Falhas do Sheets que a página deve mostrar ao
+usuário saem como ErroPlanilha (causa original em __cause__).
+"""
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import itertools
+import os
+import threading
+import time
+import weakref
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from gspread.exceptions import APIError
+
+from calculos import (
+    COLUNAS_FIXAS,
+    TIPOS_LOGICOS,
+    compactar_respostas,
+    concatenar_respostas,
+    esquema_aba,
+    matriz_notas,
+    perguntas_de_df,
+    posicoes_leitura,
+    to_number,
+)
+from planilhas_async import ClienteSheetsAsync, executar
+from planilhas_offline import cliente_offline, texto_celula
+
+# IDs das planilhas compartilhadas no Google Sheets
+PERGUNTAS_ID = "1-mlYet1m6pN510WN8V-6XEJyDovXdlQN0TLzlr0WcPY"
+ACESSOS_ID = "1p5bzFBwAOAisFZLlt3lqXjDPJG-GfL2xkkm3fxQhQRU"
+RESPOSTAS_ID = "1OKhItXlUwmYGGIVBpNIO_48Hsb5wIRZlZ6a8p_ZbheA"
+
+# Modo offline (demos, testes de carga, desenvolvimento sem rede): com
+# MELIAWARDS_OFFLINE=1 as planilhas vêm das pastas XLSX do repositório e
+# as escritas ficam em memória (ver planilhas_offline.py)
+MODO_OFFLINE = os.environ.get("MELIAWARDS_OFFLINE", "") == "1"
+ARQUIVOS_OFFLINE = {
+    PERGUNTAS_ID: "Perguntas.xlsx",
+    ACESSOS_ID: "Acessos.xlsx",
+    RESPOSTAS_ID: "Respostas.xlsx",
+}
+
+# Ciclo de avaliação corrente. Vazio = sem sharding (abas "Comercial",
+# "Técnica" e "Esg"). Com ciclo, cada envio vai para a aba
+# "<Aba> - <ciclo>" ou, se a categoria tiver grupo, "<Aba> - <ciclo> - <grupo>".
+CICLO_ATUAL = ""
+# Opcional: {categoria: grupo} para separar categorias em abas próprias
+# dentro do ciclo (o nome do grupo não pode conter " - ")
+GRUPOS_CATEGORIA = {}
+
+# --------------------------------------------------------------------------------
+# Mapeamento Tipo -> Nome da Aba na planilha de respostas
+# --------------------------------------------------------------------------------
+def mapear_tipo_para_aba(tipo: str) -> str:
+    """
+    Converte o tipo de avaliação no nome da aba da planilha de respostas.
+    - "Comercial" -> "Comercial"
+    - "Técnica"   -> "Técnica"
+    - "ESG"       -> "Esg"  (aba já existente)
+    """
+    tipo_norm = (tipo or "").strip()
+    if tipo_norm.lower() == "esg":
+        return "Esg"
+    return tipo_norm
+
+# --------------------------------------------------------------------------------
+# Conexão com Google Sheets
+# --------------------------------------------------------------------------------
+class ErroPlanilha(Exception):
+    """Falha ao gravar no Sheets, com mensagem para o usuário."""
+
+# Conta de serviço do cliente padrão (ver configurar_credenciais)
+_credenciais = {}
+
+# Backend do contexto atual (ver usar_cliente_sheets); None = cliente padrão
+_cliente_atual = contextvars.ContextVar("cliente_sheets", default=None)
+
+def configurar_credenciais(credenciais):
+    """
+    Credenciais da conta de serviço usadas pelo cliente padrão do Google
+    Sheets (o app passa st.secrets["gspread"]). Sem efeito no modo offline.
+    """
+    _credenciais.update(credenciais)
+
+@contextlib.contextmanager
+def usar_cliente_sheets(cliente, max_simultaneas=None):
+    """
+    Usa `cliente` (compatível com gspread.Client, ex.: o backend falso do
+    teste de carga) no lugar do cliente padrão dentro do bloco `with`, no
+    contexto atual; ao sair, volta ao anterior. Caches de respostas e o
+    índice por usuário são próprios de cada cliente. Threads criadas no
+    bloco herdam o cliente se rodarem em contextvars.copy_context().
+    """
+    opcoes = {"max_simultaneas": max_simultaneas} if max_simultaneas else {}
+    sheets = ClienteSheetsAsync(None, cliente=cliente, **opcoes)
+    token = _cliente_atual.set(sheets)
+    try:
+        yield sheets
+    finally:
+        _cliente_atual.reset(token)
+
+def _sheets():
+    return _cliente_atual.get() or _sheets_padrao()
+
+@lru_cache(maxsize=None)
+def _sheets_padrao():
+    """Cliente do Sheets compartilhado pelo processo (autorizado uma vez)."""
+    if MODO_OFFLINE:
+        return ClienteSheetsAsync(
+            None,
+            cliente=cliente_offline(
+                ARQUIVOS_OFFLINE, os.path.dirname(os.path.abspath(__file__))
+            ),
+        )
+    return ClienteSheetsAsync(_credenciais)
+
+# Estado compartilhado pelas sessões do processo, por cliente: cache de
+# respostas e índice por usuário (descartado com o cliente)
+_estados = weakref.WeakKeyDictionary()
+_trava_estados = threading.Lock()
+
+def _estado():
+    sheets = _sheets()
+    with _trava_estados:
+        estado = _estados.get(sheets)
+        if estado is None:
+            estado = {"respostas": _novo_cache_respostas(), "indice": _novo_indice_usuarios()}
+            _estados[sheets] = estado
+        return estado
+
+def conectar_planilha(sheet_id):
+    return _sheets().planilha(sheet_id)
+
+async def _ler_perguntas_async():
+    registros = await _sheets().ler_registros(PERGUNTAS_ID, 0)
+    return perguntas_de_df(pd.DataFrame(registros))
+
+async def _carregar_acessos_async():
+    acessos, categorias = await asyncio.gather(
+        _sheets().ler_registros(ACESSOS_ID, "Acessos"),
+        _sheets().ler_registros(ACESSOS_ID, "Categorias"),
+    )
+    return pd.DataFrame(acessos), pd.DataFrame(categorias)
+
+def ler_perguntas():
+    return executar(_ler_perguntas_async())[0]
+
+def carregar_acessos():
+    return executar(_carregar_acessos_async())[0]
+
+def carregar_base():
+    """Perguntas, Acessos e Categorias lidos em paralelo: (perguntas_ref, acessos, categorias)."""
+    perguntas_ref, (acessos, categorias) = executar(
+        _ler_perguntas_async(), _carregar_acessos_async()
+    )
+    return perguntas_ref, acessos, categorias
+
+# --------------------------------------------------------------------------------
+# Leitura das respostas (DataFrame compacto + linhas brutas sob demanda)
+# --------------------------------------------------------------------------------
+# Validade das abas no cache compartilhado (segundos): com N sessões
+# abertas, cada aba é lida da planilha no máximo uma vez por intervalo
+TTL_CACHE_RESPOSTAS = 30
+
+def _cache_respostas():
+    return _estado()["respostas"]
+
+def _novo_cache_respostas():
+    """
+    Cache de respostas por aba, compartilhado por todas as sessões do
+    processo. Cada entrada guarda o df compacto da aba, o cabeçalho, um
+    digest dos valores lidos (detecta releitura sem mudança; as linhas brutas
+    não ficam em memória), o momento da leitura e a versão: um número do
+    contador do processo, trocado a cada escrita e a cada leitura que traz
+    conteúdo diferente (nunca se repete, nem após invalidar).
+    """
+    return {
+        "abas": {},
+        "versoes": itertools.count(1),
+        "lock": threading.Lock(),
+        "leitura": {},  # trava de leitura por aba
+    }
+
+def _abas_vencidas(cache, abas, agora):
+    with cache["lock"]:
+        return [
+            aba
+            for aba in abas
+            if aba not in cache["abas"]
+            or agora - cache["abas"][aba]["lido_em"] >= TTL_CACHE_RESPOSTAS
+        ]
+
+def _travas_leitura(cache, abas):
+    """Travas de leitura das abas, em ordem de nome (evita impasse entre sessões)."""
+    with cache["lock"]:
+        return [cache["leitura"].setdefault(aba, threading.Lock()) for aba in sorted(abas)]
+
+def _digest_valores(all_values):
+    h = hashlib.blake2b(digest_size=16)
+    for linha in all_values:
+        h.update("\x1f".join(map(str, linha)).encode())
+        h.update(b"\x1e")
+    return h.digest()
+
+def _df_de_valores(all_values):
+    """(df compacto, headers) a partir dos valores de uma aba."""
+    if not all_values:
+        return pd.DataFrame(), []
+    headers = list(all_values[0])
+    raw_rows = all_values[1:]  # sem cabeçalho
+    if not raw_rows:
+        return pd.DataFrame(columns=headers), headers
+    df = compactar_respostas(pd.DataFrame(raw_rows, columns=headers, dtype=object))
+    return df, headers
+
+def obter_df_resposta(aba_ou_tipo, recarregar=False):
+    """
+    Retorna:
+      - df: DataFrame compacto (ver compactar_respostas)
+      - headers: lista com os cabeçalhos da planilha
+    Linhas exatamente como estão no Sheets: ler_linhas_brutas (escritores).
+    """
+    aba_real = mapear_tipo_para_aba(aba_ou_tipo)
+    return obter_dfs_resposta([aba_real], recarregar)[aba_real]
+
+def obter_dfs_resposta(abas, recarregar=False):
+    """
+    Várias abas de respostas, servidas pelo cache compartilhado. Abas
+    ausentes ou vencidas (TTL_CACHE_RESPOSTAS) são lidas juntas numa chamada
+    values_batch_get; cada aba é lida por uma sessão de cada vez e as demais
+    sessões que precisam dela esperam e reaproveitam o resultado (leituras de
+    abas diferentes correm em paralelo). recarregar=True ignora o cache.
+    Releitura com os mesmos valores (mesmo digest) mantém df e versão.
+    Retorna {aba: (df, headers)}; aba inexistente -> vazia. Cada df traz em
+    attrs["versao"] a versão da aba no cache (None se lida sem cache).
+    """
+    abas = list(dict.fromkeys(abas))
+    cache = _cache_respostas()
+    vencidas = abas if recarregar else _abas_vencidas(cache, abas, time.time())
+    if vencidas:
+        with contextlib.ExitStack() as travas:
+            for trava in _travas_leitura(cache, vencidas):
+                travas.enter_context(trava)
+            ler = vencidas if recarregar else _abas_vencidas(cache, vencidas, time.time())
+            if ler:
+                valores = executar(_sheets().ler_abas(RESPOSTAS_ID, ler))[0]
+                lido_em = time.time()
+                novas = {}
+                for aba, v in valores.items():
+                    digest = _digest_valores(v or [])
+                    with cache["lock"]:
+                        anterior = cache["abas"].get(aba)
+                        if anterior is not None and anterior["digest"] == digest:
+                            # Sem mudança na planilha: mantém versão e df
+                            anterior["lido_em"] = lido_em
+                            continue
+                    # df montado fora da trava do cache; os valores brutos
+                    # são descartados ao fim desta leitura
+                    novas[aba] = (*_df_de_valores(v or []), digest)
+                del valores
+                with cache["lock"]:
+                    for aba, (df, headers, digest) in novas.items():
+                        cache["abas"][aba] = {
+                            "df": df,
+                            "headers": headers,
+                            "digest": digest,
+                            "lido_em": lido_em,
+                            "versao": next(cache["versoes"]),
+                        }
+    with cache["lock"]:
+        entradas = {aba: cache["abas"].get(aba) for aba in abas}
+    descartadas = [aba for aba, e in entradas.items() if e is None]
+    if descartadas:
+        # Invalidadas por outra sessão entre a leitura e aqui: lê sem cache
+        valores = executar(_sheets().ler_abas(RESPOSTAS_ID, descartadas))[0]
+        for aba in descartadas:
+            df, headers = _df_de_valores(valores[aba] or [])
+            entradas[aba] = {"df": df, "headers": headers, "versao": None}
+    resultado = {}
+    for aba in abas:
+        df = entradas[aba]["df"].copy(deep=False)
+        df.attrs["versao"] = entradas[aba]["versao"]
+        resultado[aba] = (df, list(entradas[aba]["headers"]))
+    return resultado
+
+def ler_linhas_brutas(aba):
+    """
+    (headers, linhas) da aba exatamente como estão no Sheets, lidas agora e
+    sem passar pelo cache: escritores que precisam localizar a linha a
+    atualizar. Não são guardadas em memória. None se a aba não existe.
+    """
+    valores = executar(_sheets().ler_aba(RESPOSTAS_ID, aba))[0]
+    if valores is None:
+        return None
+    return (list(valores[0]) if valores else []), valores[1:]
+
+def _chaves_df(df):
+    """Chave email/categoria/fornecedor de cada linha de um df compacto."""
+    return (
+        df["E-mail"].astype(str).str.strip().str.lower()
+        + "\x1f" + df["Categoria"].astype(str)
+        + "\x1f" + df["Fornecedor"].astype(str)
+    )
+
+def gravar_no_cache_respostas(aba, headers, linhas_valores):
+    """
+    Write-through no df compacto da aba: as linhas recém-gravadas (no texto
+    que o Sheets devolve, ver texto_celula) substituem as de mesma chave
+    email/categoria/fornecedor ou entram ao fim, sem nova leitura da
+    planilha. Linhas substituídas passam para o fim do df até a próxima
+    leitura com mudança.
+    """
+    texto = [[texto_celula(v) for v in linha] for linha in linhas_valores]
+    novas = compactar_respostas(pd.DataFrame(texto, columns=list(headers), dtype=object))
+    cache = _cache_respostas()
+    with cache["lock"]:
+        entrada = cache["abas"].get(aba)
+        if entrada is None:
+            return
+        df = entrada["df"]
+        if not df.empty and {"E-mail", "Categoria", "Fornecedor"} <= set(df.columns):
+            df = df[~_chaves_df(df).isin(set(_chaves_df(novas)))]
+        entrada["df"] = concatenar_respostas([df, novas])
+        entrada["headers"] = list(headers)
+        entrada["digest"] = None  # próxima leitura remonta o df a partir da planilha
+        entrada["versao"] = next(cache["versoes"])
+
+def invalidar_cache_respostas(abas=None):
+    """Descarta do cache as abas informadas (todas, se None)."""
+    cache = _cache_respostas()
+    with cache["lock"]:
+        for aba in list(cache["abas"]) if abas is None else abas:
+            cache["abas"].pop(aba, None)
+
+# --------------------------------------------------------------------------------
+# Sharding das respostas por ciclo e grupo de categorias
+# --------------------------------------------------------------------------------
+SEPARADOR_SHARD = " - "
+
+def nome_shard(tipo, ciclo=None, grupo=None):
+    """
+    Nome da aba (shard) de um tipo no ciclo informado (padrão: CICLO_ATUAL).
+    Ciclo vazio -> aba original do tipo, sem sharding.
+    """
+    aba = mapear_tipo_para_aba(tipo)
+    ciclo = CICLO_ATUAL if ciclo is None else ciclo
+    if not ciclo:
+        return aba
+    return SEPARADOR_SHARD.join([aba, ciclo] + ([grupo] if grupo else []))
+
+def shard_da_categoria(tipo, categoria, ciclo=None):
+    """Aba onde ficam as avaliações de (tipo, categoria) no ciclo."""
+    return nome_shard(tipo, ciclo, GRUPOS_CATEGORIA.get(categoria))
+
+def _partes_shard(titulo):
+    """"<Aba> - <ciclo>[ - <grupo>]" -> (aba, ciclo, grupo); sem ciclo: (aba, "", None)."""
+    partes = titulo.split(SEPARADOR_SHARD, 2)
+    return partes[0], (partes[1] if len(partes) > 1 else ""), (partes[2] if len(partes) > 2 else None)
+
+def _titulos_respostas():
+    """Abas da planilha de respostas, da lista em cache no cliente."""
+    return executar(_sheets().titulos_abas(RESPOSTAS_ID))[0]
+
+def shards_do_tipo(tipo, ciclo=None, categorias=None):
+    """
+    Abas a consultar para um tipo no ciclo. Com `categorias`, apenas as dos
+    grupos dessas categorias (pela configuração atual, onde os envios são
+    gravados); sem, todas as abas do ciclo que existem na planilha, inclusive
+    de grupos renomeados ou removidos de GRUPOS_CATEGORIA.
+    """
+    if categorias is None:
+        aba = mapear_tipo_para_aba(tipo)
+        ciclo = CICLO_ATUAL if ciclo is None else ciclo
+        existentes = []
+        for titulo in _titulos_respostas():
+            aba_t, ciclo_t, grupo = _partes_shard(titulo)
+            if aba_t == aba and ciclo_t == ciclo:
+                existentes.append((grupo or "", titulo))
+        return [titulo for _, titulo in sorted(existentes)]
+    grupos = {GRUPOS_CATEGORIA.get(c) for c in categorias}
+    grupos = sorted(grupos, key=lambda g: g or "")
+    return list(dict.fromkeys(nome_shard(tipo, ciclo, g) for g in grupos))
+
+def ciclos_disponiveis():
+    """
+    Ciclos com abas na planilha de respostas ("" = abas sem ciclo), a partir
+    da lista de abas em cache no cliente (sem chamada à API a cada rerun).
+    """
+    bases = {mapear_tipo_para_aba(t) for t in TIPOS_LOGICOS}
+    ciclos = set()
+    for titulo in _titulos_respostas():
+        aba, ciclo, _ = _partes_shard(titulo)
+        if aba in bases:
+            ciclos.add(ciclo)
+    return sorted(ciclos)
+
+def obter_respostas_tipo(tipo, ciclo=None, categorias=None):
+    """
+    Junta as respostas de um tipo lendo apenas os shards necessários.
+    Retorna (df, {aba: headers}).
+    """
+    frames, headers_por_aba = [], {}
+    for aba, (df, headers) in obter_dfs_resposta(
+        shards_do_tipo(tipo, ciclo, categorias)
+    ).items():
+        if headers:
+            headers_por_aba[aba] = headers
+        frames.append(df)
+    return concatenar_respostas(frames), headers_por_aba
+
+def obter_todas_respostas(ciclo=None):
+    """Respostas de todos os tipos do ciclo; todos os shards lidos numa só chamada."""
+    abas_por_tipo = {tipo: shards_do_tipo(tipo, ciclo) for tipo in TIPOS_LOGICOS}
+    lidas = obter_dfs_resposta([a for abas in abas_por_tipo.values() for a in abas])
+    versoes = {aba: df.attrs["versao"] for aba, (df, _) in lidas.items()}
+    frames = []
+    headers_por_aba = {}
+    for tipo, abas in abas_por_tipo.items():
+        for aba in abas:
+            df, headers = lidas[aba]
+            if headers:
+                headers_por_aba[aba] = (tipo, headers)
+            if not df.empty:
+                df["Tipo"] = tipo
+                frames.append(df)
+    if frames:
+        todas = concatenar_respostas(frames)
+        # Cabeçalhos originais de cada aba (usados na detecção de divergências)
+        todas.attrs["headers"] = headers_por_aba
+        # Versões das abas lidas: chave de cache barata (ver versao_dados)
+        if None not in versoes.values():
+            todas.attrs["versoes"] = versoes
+        return todas
+    else:
+        return pd.DataFrame()
+
+# --------------------------------------------------------------------------------
+# Auxiliares de escrita
+# --------------------------------------------------------------------------------
+def coluna_para_letra(n):
+    """Converte o número da coluna (1-based) em letra: 1->A, 2->B, ..., 27->AA."""
+    s = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+def indexar_chaves(headers, raw_rows):
+    """
+    Índice (email em minúsculas, categoria, fornecedor) -> posição em raw_rows.
+    Em caso de chave duplicada vale a primeira ocorrência.
+    """
+    try:
+        idx_email = headers.index("E-mail")
+        idx_cat = headers.index("Categoria")
+        idx_forn = headers.index("Fornecedor")
+    except ValueError:
+        return {}
+    indice = {}
+    for i, row in enumerate(raw_rows):
+        try:
+            chave = (
+                str(row[idx_email]).strip().lower(),
+                str(row[idx_cat]),
+                str(row[idx_forn]),
+            )
+        except IndexError:
+            continue
+        indice.setdefault(chave, i)
+    return indice
+
+# Colunas de uma aba de respostas recém-criada
+COLUNAS_ABA_NOVA = 50
+
+def criar_aba_respostas(aba, n_colunas=0):
+    """
+    Cria a aba na planilha de respostas. Retorna True se ela foi criada
+    aqui e False se já existia (criada por outra sessão depois da lista de
+    abas em cache).
+    """
+    sheets = _sheets()
+    try:
+        executar(
+            sheets.criar_aba(RESPOSTAS_ID, aba, colunas=max(COLUNAS_ABA_NOVA, n_colunas))
+        )
+        return True
+    except APIError as e:
+        if aba in executar(sheets.titulos_abas(RESPOSTAS_ID, recarregar=True))[0]:
+            return False
+        raise ErroPlanilha(
+            "Não foi possível criar a aba no Google Sheets. "
+            "Verifique limites de abas e permissões."
+        ) from e
+
+# --------------------------------------------------------------------------------
+# Escrita: upsert de uma ou várias linhas com poucas chamadas à API
+# --------------------------------------------------------------------------------
+# Limite de linhas por chamada de escrita (mantém o payload dentro do
+# tamanho aceito pela API do Sheets)
+LINHAS_POR_ESCRITA = 5000
+# Casas decimais dos números gravados (nota * peso sem resíduo de ponto
+# flutuante, ex.: 0.15000000000000002 -> 0.15)
+CASAS_ESCRITA = 10
+
+def gravar_linhas_em_lote(tipo, perguntas, linhas):
+    """
+    Upsert de avaliações de um mesmo tipo: cada linha vai para o shard da
+    sua categoria no ciclo atual (ver shard_da_categoria).
+    Retorna (abas gravadas, n_inseridas, n_atualizadas).
+    """
+    abas, inseridas, atualizadas = [], 0, 0
+    if linhas.empty:
+        return abas, inseridas, atualizadas
+    destinos = linhas["Categoria"].astype(str).map(
+        lambda c: shard_da_categoria(tipo, c)
+    )
+    for aba, linhas_aba in linhas.groupby(destinos, sort=False):
+        n_ins, n_atu = gravar_linhas_na_aba(aba, perguntas, linhas_aba)
+        abas.append(aba)
+        inseridas += n_ins
+        atualizadas += n_atu
+    atualizar_indice_usuarios(tipo, perguntas, linhas)
+    return abas, inseridas, atualizadas
+
+def gravar_linhas_na_aba(aba, perguntas, linhas):
+    """
+    Upsert de avaliações em uma aba, sem regravar a aba inteira.
+    - linhas: DataFrame com Data, Hora, E-mail, Categoria, Fornecedor e uma
+      coluna com a nota pura de cada pergunta.
+    As colunas "(PONDERADA)" são calculadas aqui (nota * peso). A aba é lida
+    uma vez; linhas cuja chave (email, categoria, fornecedor) já existe são
+    sobrescritas no lugar com um único batch_update e as novas são
+    acrescentadas com append_rows. As demais linhas da planilha permanecem
+    exatamente como estão. Chaves repetidas em `linhas`: vale a última.
+    Retorna (n_inseridas, n_atualizadas).
+    """
+    if linhas.empty:
+        return 0, 0
+
+    # A existência da aba vem da lista em cache: sem chamada de metadados
+    brutas = ler_linhas_brutas(aba)
+    criada = False
+    if brutas is None:
+        criada = criar_aba_respostas(aba, len(esquema_aba(perguntas, [])["headers"]))
+        brutas = ([], []) if criada else ler_linhas_brutas(aba) or ([], [])
+    headers_existentes, raw_rows = brutas
+    esquema = esquema_aba(perguntas, headers_existentes)
+    headers = list(esquema["headers"])
+
+    chaves = list(
+        zip(
+            linhas["E-mail"].astype(str).str.strip().str.lower(),
+            linhas["Categoria"].astype(str),
+            linhas["Fornecedor"].astype(str),
+        )
+    )
+    ultima_por_chave = {chave: i for i, chave in enumerate(chaves)}
+    manter = sorted(ultima_por_chave.values())
+    linhas = linhas.iloc[manter]
+    chaves = [chaves[i] for i in manter]
+
+    # Matriz de valores montada por posição; notas e ponderadas vetorizadas
+    notas = (
+        linhas.reindex(columns=[q for (q, p) in perguntas])
+        .apply(pd.to_numeric, errors="coerce")
+        .to_numpy(dtype=float)
+    )
+    ponderadas = notas * esquema["pesos"]
+    matriz = np.full((len(linhas), len(headers)), "", dtype=object)
+    matriz[:, esquema["pos_fixas"]] = linhas[COLUNAS_FIXAS].astype(str).to_numpy()
+    for bloco, posicoes in (
+        (notas, esquema["pos_perguntas"]),
+        (ponderadas, esquema["pos_ponderadas"]),
+    ):
+        bloco = np.round(bloco, CASAS_ESCRITA)
+        matriz[:, posicoes] = np.where(np.isnan(bloco), "", bloco.astype(object))
+
+    indice = indexar_chaves(headers, raw_rows)
+    existentes = [indice.get(chave) for chave in chaves]
+    ultima_coluna = coluna_para_letra(len(headers))
+
+    atualizacoes = []
+    if esquema["cabecalho_alterado"]:
+        atualizacoes.append({"range": f"A1:{ultima_coluna}1", "values": [headers]})
+    novas = []
+    for valores, linha in zip(matriz.tolist(), existentes):
+        if linha is None:
+            novas.append(valores)
+        else:
+            linha_planilha = linha + 2  # linha 1 = cabeçalho
+            atualizacoes.append(
+                {
+                    "range": f"A{linha_planilha}:{ultima_coluna}{linha_planilha}",
+                    "values": [valores],
+                }
+            )
+
+    async def _enviar():
+        sheets = _sheets()
+        # Só busca a aba (metadados) quando o cabeçalho de uma aba existente cresce
+        if not criada and len(headers) > len(headers_existentes):
+            await sheets.garantir_colunas(RESPOSTAS_ID, aba, len(headers))
+        for ini in range(0, len(atualizacoes), LINHAS_POR_ESCRITA):
+            await sheets.atualizar_intervalos(
+                RESPOSTAS_ID, aba, atualizacoes[ini:ini + LINHAS_POR_ESCRITA]
+            )
+        # append no servidor: inserções concorrentes não se sobrescrevem
+        for ini in range(0, len(novas), LINHAS_POR_ESCRITA):
+            await sheets.anexar_linhas(
+                RESPOSTAS_ID, aba, novas[ini:ini + LINHAS_POR_ESCRITA]
+            )
+
+    try:
+        executar(_enviar())
+    except APIError as e:
+        invalidar_cache_respostas([aba])
+        raise ErroPlanilha(
+            "Erro ao salvar dados na planilha do Google Sheets. "
+            "Tente novamente em alguns instantes."
+        ) from e
+    gravar_no_cache_respostas(aba, headers, matriz.tolist())
+    return len(novas), len(linhas) - len(novas)
+
+# --------------------------------------------------------------------------------
+# Lógica de salvar resposta ponderada
+# --------------------------------------------------------------------------------
+def salvar_resposta_ponderada(tipo, email, categoria, fornecedor, respostas, perguntas):
+    """
+    Grava a avaliação de um fornecedor (nota pura + ponderada de cada
+    pergunta). Retorna (aba, linha gravada como DataFrame).
+    """
+    hoje = datetime.now()
+    linha = pd.DataFrame(
+        [
+            {
+                "Data": hoje.strftime("%d/%m/%Y"),
+                "Hora": hoje.strftime("%H:%M:%S"),
+                "E-mail": email,
+                "Categoria": categoria,
+                "Fornecedor": fornecedor,
+                **{q: to_number(respostas[q]) for (q, p) in perguntas},
+            }
+        ]
+    )
+    abas, _, _ = gravar_linhas_em_lote(tipo, perguntas, linha)
+    return abas[0], linha
+
+def salvar_respostas_em_lote(tipo, email, categoria, notas_por_fornecedor, perguntas):
+    """
+    Grava as avaliações de vários fornecedores da mesma categoria (modo grade).
+    - notas_por_fornecedor: {fornecedor: {pergunta: nota}}
+    Uma leitura da aba e uma escrita em lote para todas as linhas.
+    Retorna (abas gravadas, n_inseridas, n_atualizadas).
+    """
+    hoje = datetime.now()
+    data_str = hoje.strftime("%d/%m/%Y")
+    hora_str = hoje.strftime("%H:%M:%S")
+    linhas = pd.DataFrame(
+        [
+            {
+                "Data": data_str,
+                "Hora": hora_str,
+                "E-mail": email,
+                "Categoria": categoria,
+                "Fornecedor": fornecedor,
+                **{q: to_number(notas.get(q)) for (q, p) in perguntas},
+            }
+            for fornecedor, notas in notas_por_fornecedor.items()
+        ]
+    )
+    return gravar_linhas_em_lote(tipo, perguntas, linhas)
+
+# --------------------------------------------------------------------------------
+# Índice por usuário (Prévia das Notas)
+# --------------------------------------------------------------------------------
+# Intervalo máximo entre sincronizações completas do índice com a planilha
+INTERVALO_SINC_INDICE = 300  # segundos
+TAMANHO_PAGINA_PREVIA = 60
+
+def _indice_usuarios():
+    return _estado()["indice"]
+
+def _novo_indice_usuarios():
+    """
+    Índice compartilhado por todas as sessões do processo:
+    por_email = {email: {(tipo, categoria, fornecedor): registro}}.
+    `recentes` guarda as atualizações feitas durante uma sincronização para
+    reaplicá-las sobre o índice recém-montado; `sincronizacao` garante uma
+    sincronização por vez.
+    """
+    return {
+        "por_email": {},
+        "sincronizado_em": 0.0,
+        "sincronizando_desde": None,
+        "recentes": [],
+        "lock": threading.Lock(),
+        "sincronizacao": threading.Lock(),
+    }
+
+def _registros_do_indice(tipo, perguntas, linhas):
+    """Gera (email, chave, registro) para cada linha, com notas lidas por posição."""
+    esquema = esquema_aba(perguntas, list(linhas.columns))
+    notas = matriz_notas(
+        linhas, posicoes_leitura(esquema, esquema["pos_perguntas"])
+    )
+    colunas_q = [q for (q, p) in perguntas]
+    datas = linhas["Data"] if "Data" in linhas.columns else pd.Series("", index=linhas.index)
+    if pd.api.types.is_datetime64_any_dtype(datas):
+        datas = datas.dt.strftime("%d/%m/%Y").fillna("")
+    for email, categoria, fornecedor, data, notas_linha in zip(
+        linhas["E-mail"].astype(str).str.strip().str.lower(),
+        linhas["Categoria"].astype(str),
+        linhas["Fornecedor"].astype(str),
+        datas.astype(str),
+        np.round(notas.astype(float), 4).tolist(),
+    ):
+        yield email, (tipo, categoria, fornecedor), {
+            "Data": data,
+            "Notas": dict(zip(colunas_q, notas_linha)),
+        }
+
+def sincronizar_indice_usuarios(perguntas_ref):
+    """
+    Remonta o índice a partir das abas (shards) do ciclo atual. Se outra
+    sessão já está sincronizando, não faz nada e o índice atual continua
+    valendo; só a primeira montagem espera pela sincronização em andamento.
+    """
+    indice = _indice_usuarios()
+    primeira = indice["sincronizado_em"] == 0.0
+    if not indice["sincronizacao"].acquire(blocking=primeira):
+        return
+    try:
+        if primeira and indice["sincronizado_em"] != 0.0:
+            return  # montado pela sessão que estava sincronizando
+        _sincronizar_indice(indice, perguntas_ref)
+    finally:
+        indice["sincronizacao"].release()
+
+def _sincronizar_indice(indice, perguntas_ref):
+    inicio = time.time()
+    with indice["lock"]:
+        indice["sincronizando_desde"] = inicio
+    novo = {}
+    abas_por_tipo = {tipo: shards_do_tipo(tipo) for tipo in TIPOS_LOGICOS}
+    lidas = obter_dfs_resposta([a for abas in abas_por_tipo.values() for a in abas])
+    for tipo, abas in abas_por_tipo.items():
+        df = concatenar_respostas([lidas[aba][0] for aba in abas])
+        if df.empty or "E-mail" not in df.columns:
+            continue
+        for email, chave, registro in _registros_do_indice(
+            tipo, perguntas_ref.get(tipo) or [], df
+        ):
+            novo.setdefault(email, {})[chave] = registro
+    with indice["lock"]:
+        # Envios gravados enquanto as abas eram lidas
+        for email, chave, registro in indice["recentes"]:
+            novo.setdefault(email, {})[chave] = registro
+        indice["por_email"] = novo
+        indice["sincronizado_em"] = inicio
+        indice["sincronizando_desde"] = None
+        indice["recentes"] = []
+
+def atualizar_indice_usuarios(tipo, perguntas, linhas):
+    """Aplica ao índice as linhas recém-gravadas (chamado pelos escritores)."""
+    indice = _indice_usuarios()
+    with indice["lock"]:
+        for email, chave, registro in _registros_do_indice(tipo, perguntas, linhas):
+            indice["por_email"].setdefault(email, {})[chave] = registro
+            if indice["sincronizando_desde"] is not None:
+                indice["recentes"].append((email, chave, registro))
+
+def avaliacoes_do_usuario(email, tipos, perguntas_ref):
+    """
+    Avaliações de um e-mail a partir do índice, em formato longo
+    (Tipo, Categoria, Fornecedor, Data, Questão, Nota Atribuída).
+    Sincroniza o índice só quando ele está vencido.
+    """
+    indice = _indice_usuarios()
+    if time.time() - indice["sincronizado_em"] > INTERVALO_SINC_INDICE:
+        sincronizar_indice_usuarios(perguntas_ref)
+    with indice["lock"]:
+        registros = dict(indice["por_email"].get(email.strip().lower(), {}))
+
+    ordem_tipo = {t: i for i, t in enumerate(tipos)}
+    linhas = []
+    for (tipo, categoria, fornecedor), registro in sorted(
+        registros.items(),
+        key=lambda item: (ordem_tipo.get(item[0][0], len(tipos)), item[0][1], item[0][2]),
+    ):
+        if tipo not in ordem_tipo:
+            continue
+        for pergunta, _ in perguntas_ref.get(tipo) or []:
+            linhas.append(
+                (
+                    tipo,
+                    categoria,
+                    fornecedor,
+                    registro["Data"],
+                    pergunta,
+                    registro["Notas"].get(pergunta),
+                )
+            )
+    return pd.DataFrame(
+        linhas,
+        columns=["Tipo", "Categoria", "Fornecedor", "Data", "Questão", "Nota Atribuída"],
+    )
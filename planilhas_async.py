@@ -0,0 +1,232 @@
+"""
+Acesso assíncrono ao Google Sheets.
+
+O gspread é síncrono: cada chamada bloqueia a thread até a API responder.
+Aqui as chamadas rodam em threads (asyncio.to_thread), com um único cliente
+autorizado e as planilhas abertas reaproveitados entre chamadas, e um
+semáforo do processo que limita quantas chamadas ficam em andamento ao
+mesmo tempo, somando todas as sessões (respeitando a cota da API). Assim o
+app pode disparar várias leituras ou escritas independentes e aguardar
+todas juntas:
+
+    sheets = ClienteSheetsAsync(credenciais)
+    perguntas, acessos = executar(
+        sheets.ler_registros(PERGUNTAS_ID, 0),
+        sheets.ler_registros(ACESSOS_ID, "Acessos"),
+    )
+
+Sem dependência do Streamlit.
+"""
+import asyncio
+import threading
+import time
+
+import gspread
+from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name, fill_gaps
+from oauth2client.service_account import ServiceAccountCredentials
+
+ESCOPO = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+# Chamadas à API em andamento ao mesmo tempo (no processo inteiro)
+MAX_CHAMADAS_SIMULTANEAS = 8
+# Validade da lista de abas de cada planilha (segundos)
+TTL_TITULOS = 60
+
+class ClienteSheetsAsync:
+    """
+    Cliente compartilhado: autoriza uma vez, guarda as planilhas abertas e
+    expõe leituras e escritas como corrotinas.
+    - credenciais: dicionário da conta de serviço (ex.: st.secrets["gspread"])
+    - cliente: cliente já pronto, compatível com gspread.Client (ex.: o
+      ClienteMemoria do modo offline); dispensa as credenciais
+    """
+
+    def __init__(self, credenciais, max_simultaneas=MAX_CHAMADAS_SIMULTANEAS, cliente=None):
+        self._credenciais = credenciais
+        self._cliente = cliente
+        self._planilhas = {}
+        self._titulos = {}
+        self._listagens = {}  # trava por planilha: uma listagem de abas por vez
+        self._trava = threading.Lock()
+        # Compartilhado por todos os event loops (cada executar() cria o seu)
+        self._limite = threading.BoundedSemaphore(max_simultaneas)
+
+    # ----------------------------------------------------------------------------
+    # Conexão reaproveitada (também usada pelo código síncrono)
+    # ----------------------------------------------------------------------------
+    def cliente(self):
+        with self._trava:
+            if self._cliente is None:
+                creds = ServiceAccountCredentials.from_json_keyfile_dict(
+                    self._credenciais, ESCOPO
+                )
+                self._cliente = gspread.authorize(creds)
+            return self._cliente
+
+    def planilha(self, sheet_id):
+        """Planilha aberta (open_by_key só na primeira vez)."""
+        cliente = self.cliente()
+        with self._trava:
+            if sheet_id not in self._planilhas:
+                self._planilhas[sheet_id] = cliente.open_by_key(sheet_id)
+            return self._planilhas[sheet_id]
+
+    async def _em_thread(self, funcao, *args, **kwargs):
+        """Roda uma chamada bloqueante numa thread, dentro do limite do processo."""
+        def _limitada():
+            with self._limite:
+                return funcao(*args, **kwargs)
+
+        return await asyncio.to_thread(_limitada)
+
+    # ----------------------------------------------------------------------------
+    # Lista de abas (em cache por TTL_TITULOS)
+    # ----------------------------------------------------------------------------
+    async def titulos_abas(self, sheet_id, recarregar=False):
+        """
+        Títulos das abas. Uma chamada worksheets() por vez por planilha: quem
+        chega durante a listagem espera e usa o resultado dela.
+        """
+        pedido_em = time.monotonic()
+
+        def _valida():
+            with self._trava:
+                salvo = self._titulos.get(sheet_id)
+            if salvo is None:
+                return None
+            if recarregar:
+                return salvo[1] if salvo[0] >= pedido_em else None
+            return salvo[1] if time.monotonic() - salvo[0] < TTL_TITULOS else None
+
+        titulos = _valida()
+        if titulos is not None:
+            return list(titulos)
+        with self._trava:
+            listagem = self._listagens.setdefault(sheet_id, threading.Lock())
+        await asyncio.to_thread(listagem.acquire)
+        try:
+            titulos = _valida()
+            if titulos is None:
+                planilha = await self._em_thread(self.planilha, sheet_id)
+                abas = await self._em_thread(planilha.worksheets)
+                titulos = [ws.title for ws in abas]
+                with self._trava:
+                    self._titulos[sheet_id] = (time.monotonic(), titulos)
+        finally:
+            listagem.release()
+        return list(titulos)
+
+    def registrar_aba(self, sheet_id, titulo):
+        """Marca a aba como existente na lista em cache (ex.: logo após criá-la)."""
+        with self._trava:
+            salvo = self._titulos.get(sheet_id)
+            if salvo and titulo not in salvo[1]:
+                self._titulos[sheet_id] = (salvo[0], salvo[1] + [titulo])
+
+    # ----------------------------------------------------------------------------
+    # Leituras
+    # ----------------------------------------------------------------------------
+
+    async def ler_registros(self, sheet_id, aba):
+        """get_all_records de uma aba (pelo título ou pela posição)."""
+        planilha = await self._em_thread(self.planilha, sheet_id)
+
+        def _ler():
+            if isinstance(aba, int):
+                worksheet = planilha.get_worksheet(aba)
+            else:
+                worksheet = planilha.worksheet(aba)
+            return worksheet.get_all_records()
+
+        return await self._em_thread(_ler)
+
+    async def ler_abas(self, sheet_id, abas):
+        """
+        Todos os valores de várias abas em uma única chamada (values_batch_get),
+        como em get_all_values (linhas completadas com ""). Retorna
+        {aba: lista de listas}, com None para abas que não existem.
+        As abas existentes vêm da lista em cache; se uma delas sumiu da
+        planilha (a API recusa o intervalo), a lista é relida e a leitura
+        refeita uma vez.
+        """
+        abas = list(dict.fromkeys(abas))
+        planilha = await self._em_thread(self.planilha, sheet_id)
+        for tentativa in range(2):
+            existentes = set(await self.titulos_abas(sheet_id, recarregar=tentativa > 0))
+            lidas = [aba for aba in abas if aba in existentes]
+            valores = {aba: None for aba in abas}
+            if not lidas:
+                return valores
+            try:
+                resposta = await self._em_thread(
+                    planilha.values_batch_get, [absolute_range_name(aba) for aba in lidas]
+                )
+            except APIError as e:
+                if e.code != 400 or tentativa:
+                    raise
+                continue
+            for aba, intervalo in zip(lidas, resposta.get("valueRanges", [])):
+                valores[aba] = fill_gaps(intervalo.get("values", []))
+            return valores
+
+    async def ler_aba(self, sheet_id, aba):
+        """Valores de uma aba (None se ela não existir)."""
+        return (await self.ler_abas(sheet_id, [aba]))[aba]
+
+    # ----------------------------------------------------------------------------
+    # Escritas
+    # ----------------------------------------------------------------------------
+    async def anexar_linhas(self, sheet_id, aba, linhas, value_input_option="USER_ENTERED"):
+        """Acrescenta linhas ao fim da tabela da aba (como Worksheet.append_rows)."""
+        planilha = await self._em_thread(self.planilha, sheet_id)
+        return await self._em_thread(
+            planilha.values_append,
+            absolute_range_name(aba),
+            {"valueInputOption": value_input_option},
+            {"values": linhas},
+        )
+
+    async def atualizar_intervalos(self, sheet_id, aba, dados, value_input_option="USER_ENTERED"):
+        """
+        Grava vários intervalos da aba em uma chamada (como Worksheet.batch_update).
+        - dados: [{"range": "A2:F2", "values": [[...]]}, ...]
+        """
+        planilha = await self._em_thread(self.planilha, sheet_id)
+        corpo = {
+            "valueInputOption": value_input_option,
+            "data": [
+                {"range": absolute_range_name(aba, d["range"]), "values": d["values"]}
+                for d in dados
+            ],
+        }
+        return await self._em_thread(planilha.values_batch_update, corpo)
+
+    async def criar_aba(self, sheet_id, titulo, linhas=100, colunas=26):
+        """Cria a aba e a acrescenta à lista de abas em cache."""
+        planilha = await self._em_thread(self.planilha, sheet_id)
+        await self._em_thread(planilha.add_worksheet, title=titulo, rows=linhas, cols=colunas)
+        self.registrar_aba(sheet_id, titulo)
+
+    async def garantir_colunas(self, sheet_id, aba, n_colunas):
+        """Acrescenta colunas à aba se ela tiver menos que n_colunas."""
+        planilha = await self._em_thread(self.planilha, sheet_id)
+
+        def _garantir():
+            worksheet = planilha.worksheet(aba)
+            if worksheet.col_count < n_colunas:
+                worksheet.add_cols(n_colunas - worksheet.col_count)
+
+        await self._em_thread(_garantir)
+
+def executar(*corrotinas):
+    """
+    Aguarda as corrotinas juntas a partir de código síncrono (ex.: o script
+    do Streamlit) e devolve os resultados na mesma ordem.
+    """
+    async def _todas():
+        return await asyncio.gather(*corrotinas)
+
+    return asyncio.run(_todas())
@@ -0,0 +1,246 @@
+"""
+Modo offline: as planilhas do app servidas a partir das pastas XLSX do
+repositório (Perguntas.xlsx, Acessos.xlsx, Respostas.xlsx), sem rede.
+
+As pastas são lidas com openpyxl em modo read_only (linha a linha) e as
+abas já convertidas em texto, como o Sheets devolve, ficam num cache
+pickle em .cache_offline/, chaveado pelo mtime e pelo hash do arquivo:
+as próximas inicializações não abrem o XLSX.
+
+ClienteMemoria imita a parte do cliente gspread usada pelo app
+(open_by_key, worksheets, values_batch_get, values_append, ...). As
+escritas ficam em memória enquanto o processo estiver no ar.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from datetime import date, datetime, time
+from pathlib import Path
+
+import openpyxl
+from gspread.exceptions import SpreadsheetNotFound, WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, fill_gaps, numericise_all
+
+PASTA_CACHE = ".cache_offline"
+# Formato do cache pickle; mude ao alterar o conteúdo salvo (caches de outra
+# versão são descartados e a pasta é relida)
+VERSAO_CACHE = 1
+
+# --------------------------------------------------------------------------------
+# Leitura das pastas XLSX (com cache do resultado)
+# --------------------------------------------------------------------------------
+def texto_celula(valor, formato=None):
+    """Valor de célula como o texto que o Sheets exibiria."""
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "TRUE" if valor else "FALSE"
+    if isinstance(valor, datetime):
+        if valor.time() == time(0):
+            return valor.strftime("%d/%m/%Y")
+        return valor.strftime("%d/%m/%Y %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, time):
+        return valor.strftime("%H:%M:%S")
+    if isinstance(valor, (int, float)):
+        if formato and "%" in formato:
+            return f"{round(valor * 100, 10):g}%"
+        if float(valor).is_integer():
+            return str(int(valor))
+        return repr(float(valor))
+    return str(valor)
+
+def ler_pasta_xlsx(caminho):
+    """{aba: linhas de texto} de uma pasta XLSX, lida em modo read_only."""
+    pasta = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        abas = {}
+        for ws in pasta.worksheets:
+            linhas = []
+            for linha in ws.iter_rows():
+                valores = [
+                    texto_celula(c.value, getattr(c, "number_format", None))
+                    for c in linha
+                ]
+                while valores and valores[-1] == "":
+                    valores.pop()
+                linhas.append(valores)
+            while linhas and not linhas[-1]:
+                linhas.pop()
+            abas[ws.title] = fill_gaps(linhas) if linhas else []
+        return abas
+    finally:
+        pasta.close()
+
+def _hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def carregar_pasta(caminho, pasta_cache=None):
+    """
+    Abas da pasta XLSX, usando o cache pickle quando o arquivo não mudou:
+    mesmo mtime/tamanho -> cache direto; mtime diferente mas mesmo hash ->
+    cache (e o mtime é atualizado); senão a pasta é relida. Cache ilegível
+    ou de outra VERSAO_CACHE conta como ausente.
+    """
+    caminho = Path(caminho)
+    info = caminho.stat()
+    destino = Path(pasta_cache or caminho.parent / PASTA_CACHE) / f"{caminho.name}.pkl"
+    salvo = None
+    try:
+        with open(destino, "rb") as f:
+            salvo = pickle.load(f)
+    except Exception:
+        pass  # ausente, truncado ou gravado por outra versão do código
+    if not isinstance(salvo, dict) or salvo.get("versao") != VERSAO_CACHE:
+        salvo = None
+    if salvo and (salvo["mtime_ns"], salvo["tamanho"]) == (info.st_mtime_ns, info.st_size):
+        return salvo["abas"]
+
+    sha256 = _hash_arquivo(caminho)
+    abas = salvo["abas"] if salvo and salvo["sha256"] == sha256 else ler_pasta_xlsx(caminho)
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=destino.parent, delete=False) as tmp:
+            pickle.dump(
+                {
+                    "versao": VERSAO_CACHE,
+                    "mtime_ns": info.st_mtime_ns,
+                    "tamanho": info.st_size,
+                    "sha256": sha256,
+                    "abas": abas,
+                },
+                tmp,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp.name, destino)
+    except OSError:
+        pass  # sem permissão de escrita: segue sem cache
+    return abas
+
+# --------------------------------------------------------------------------------
+# Stand-in do cliente gspread em memória
+# --------------------------------------------------------------------------------
+def _separar_intervalo(intervalo):
+    """"'Aba'!A2:F2" -> ("Aba", "A2:F2"); "'Aba'" -> ("Aba", "")."""
+    aba, sep, a1 = intervalo.rpartition("!")
+    if not sep:
+        aba, a1 = intervalo, ""
+    if aba.startswith("'") and aba.endswith("'"):
+        aba = aba[1:-1].replace("''", "'")
+    return aba, a1
+
+class AbaMemoria:
+    """Aba com os valores em texto; imita o que o app usa de gspread.Worksheet."""
+
+    def __init__(self, title, valores=None, cols=26):
+        self.title = title
+        self._valores = [list(v) for v in (valores or [])]
+        self.col_count = max(cols, max((len(v) for v in self._valores), default=0))
+        self._trava = threading.Lock()
+
+    @property
+    def row_count(self):
+        return max(1000, len(self._valores))
+
+    def add_cols(self, n):
+        self.col_count += n
+
+    def get_all_values(self):
+        with self._trava:
+            return fill_gaps([list(v) for v in self._valores]) if self._valores else []
+
+    def get_all_records(self):
+        valores = self.get_all_values()
+        if not valores:
+            return []
+        return [
+            dict(zip(valores[0], numericise_all(v, empty2zero=False, default_blank="")))
+            for v in valores[1:]
+        ]
+
+    def gravar(self, a1, linhas):
+        grade = a1_range_to_grid_range(a1)
+        lin0 = grade.get("startRowIndex", 0)
+        col0 = grade.get("startColumnIndex", 0)
+        with self._trava:
+            for i, linha in enumerate(linhas):
+                while len(self._valores) <= lin0 + i:
+                    self._valores.append([])
+                atual = self._valores[lin0 + i]
+                atual.extend([""] * (col0 + len(linha) - len(atual)))
+                atual[col0:col0 + len(linha)] = [texto_celula(v) for v in linha]
+
+    def anexar(self, linhas):
+        with self._trava:
+            self._valores.extend([texto_celula(v) for v in linha] for linha in linhas)
+
+class PlanilhaMemoria:
+    """Planilha em memória; imita o que o app usa de gspread.Spreadsheet."""
+
+    def __init__(self, abas, id=""):
+        self.id = id
+        self._abas = {titulo: AbaMemoria(titulo, v) for titulo, v in abas.items()}
+        self._trava = threading.Lock()
+
+    def worksheets(self):
+        with self._trava:
+            return list(self._abas.values())
+
+    def worksheet(self, titulo):
+        with self._trava:
+            if titulo not in self._abas:
+                raise WorksheetNotFound(titulo)
+            return self._abas[titulo]
+
+    def get_worksheet(self, indice):
+        return self.worksheets()[indice]
+
+    def add_worksheet(self, title, rows=100, cols=26):
+        with self._trava:
+            self._abas.setdefault(title, AbaMemoria(title, cols=int(cols)))
+            return self._abas[title]
+
+    def values_batch_get(self, ranges, params=None):
+        valores = []
+        for intervalo in ranges:
+            aba, _ = _separar_intervalo(intervalo)
+            valores.append({"range": intervalo, "values": self.worksheet(aba).get_all_values()})
+        return {"valueRanges": valores}
+
+    def values_append(self, range, params, body):
+        aba, _ = _separar_intervalo(range)
+        self.worksheet(aba).anexar(body.get("values", []))
+        return {"updates": {"updatedRows": len(body.get("values", []))}}
+
+    def values_batch_update(self, body):
+        for dado in body.get("data", []):
+            aba, a1 = _separar_intervalo(dado["range"])
+            self.worksheet(aba).gravar(a1, dado["values"])
+        return {"totalUpdatedRows": sum(len(d["values"]) for d in body.get("data", []))}
+
+class ClienteMemoria:
+    """Stand-in de gspread.Client: {sheet_id: {aba: linhas}} em memória."""
+
+    def __init__(self, planilhas):
+        self._planilhas = {k: PlanilhaMemoria(abas, k) for k, abas in planilhas.items()}
+
+    def open_by_key(self, sheet_id):
+        if sheet_id not in self._planilhas:
+            raise SpreadsheetNotFound(sheet_id)
+        return self._planilhas[sheet_id]
+
+def cliente_offline(arquivos, pasta_base="."):
+    """ClienteMemoria com as planilhas {sheet_id: arquivo XLSX} carregadas."""
+    return ClienteMemoria(
+        {
+            sheet_id: carregar_pasta(Path(pasta_base) / arquivo)
+            for sheet_id, arquivo in arquivos.items()
+        }
+    )
@@ -0,0 +1,408 @@
+"""
+Teste de carga do Meli Awards contra um backend falso do Google Sheets.
+
+Simula avaliadores enviando avaliações ao mesmo tempo pelo mesmo caminho da
+página (salvar_resposta_ponderada) e administradores abrindo o painel
+(obter_todas_respostas + totais, Top 3, contagem e progresso). O backend é
+uma cópia em memória das pastas XLSX do repositório (ver
+planilhas_offline.py), com latência por chamada e limite de chamadas por
+minuto configuráveis; ao estourar o limite a chamada falha com HTTP 429,
+como na API real.
+
+Ao final informa vazão, latências p50/p95/p99, chamadas à API por envio e
+por abertura do painel e violações de integridade: chaves (e-mail,
+categoria, fornecedor) repetidas numa aba e envios confirmados que não
+estão na planilha.
+
+Exemplo:
+    python teste_carga.py --avaliadores 200 --fornecedores 3 --admins 5 \\
+        --latencia-ms 150 --limite-por-minuto 600 --envios-duplicados 0.1
+"""
+import argparse
+import collections
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from gspread.exceptions import APIError
+
+import planilhas
+from calculos import (
+    TIPOS_LOGICOS,
+    calcular_contagem,
+    calcular_progresso,
+    calcular_top3,
+    calcular_totais,
+)
+from planilhas_offline import AbaMemoria, PlanilhaMemoria, cliente_offline
+
+# Métodos do cliente gspread que correspondem a chamadas à API
+CHAMADAS_API = {
+    "open_by_key",
+    "worksheets",
+    "worksheet",
+    "get_worksheet",
+    "add_worksheet",
+    "values_batch_get",
+    "values_append",
+    "values_batch_update",
+    "get_all_records",
+    "get_all_values",
+    "add_cols",
+}
+
+# Contador de chamadas da operação em andamento (envio ou painel). Passa
+# para as threads do asyncio.to_thread junto com o contexto.
+_chamadas_operacao = contextvars.ContextVar("chamadas_operacao", default=None)
+
+# --------------------------------------------------------------------------------
+# Backend falso com latência e limite de chamadas
+# --------------------------------------------------------------------------------
+def _erro_429():
+    resposta = requests.Response()
+    resposta.status_code = 429
+    resposta._content = json.dumps(
+        {
+            "error": {
+                "code": 429,
+                "message": "Quota exceeded (teste de carga)",
+                "status": "RESOURCE_EXHAUSTED",
+            }
+        }
+    ).encode()
+    return APIError(resposta)
+
+class BackendFalso:
+    """
+    Envolve um ClienteMemoria: cada chamada à API espera a latência
+    configurada, conta para o limite por minuto (janela deslizante) e é
+    registrada por método e por operação.
+    """
+
+    def __init__(self, cliente, latencia_ms=100.0, variacao_ms=50.0, limite_por_minuto=0, semente=0):
+        self._cliente = cliente
+        self._latencia = latencia_ms / 1000.0
+        self._variacao = variacao_ms / 1000.0
+        self._limite = limite_por_minuto
+        self._janela = collections.deque()
+        self._rng = random.Random(semente)
+        self._trava = threading.Lock()
+        self.chamadas = collections.Counter()
+        self.recusadas = 0
+
+    def registrar_chamada(self, nome):
+        agora = time.monotonic()
+        with self._trava:
+            if self._limite:
+                while self._janela and agora - self._janela[0] >= 60.0:
+                    self._janela.popleft()
+                if len(self._janela) >= self._limite:
+                    self.recusadas += 1
+                    raise _erro_429()
+                self._janela.append(agora)
+            self.chamadas[nome] += 1
+            espera = max(0.0, self._latencia + self._rng.uniform(-self._variacao, self._variacao))
+        contador = _chamadas_operacao.get()
+        if contador is not None:
+            contador[0] += 1
+        time.sleep(espera)
+
+    def open_by_key(self, sheet_id):
+        self.registrar_chamada("open_by_key")
+        return _Lento(self, self._cliente.open_by_key(sheet_id))
+
+class _Lento:
+    """Proxy de planilha/aba em memória que passa cada chamada pelo backend."""
+
+    def __init__(self, backend, alvo):
+        self._backend = backend
+        self._alvo = alvo
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._alvo, nome)
+        if nome not in CHAMADAS_API:
+            return atributo
+
+        def chamada(*args, **kwargs):
+            self._backend.registrar_chamada(nome)
+            return self._envolver(atributo(*args, **kwargs))
+
+        return chamada
+
+    def _envolver(self, valor):
+        if isinstance(valor, (AbaMemoria, PlanilhaMemoria)):
+            return _Lento(self._backend, valor)
+        if isinstance(valor, list) and valor and isinstance(valor[0], AbaMemoria):
+            return [_Lento(self._backend, v) for v in valor]
+        return valor
+
+# --------------------------------------------------------------------------------
+# Usuários simulados
+# --------------------------------------------------------------------------------
+class Resultados:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.latencias = collections.defaultdict(list)
+        self.chamadas = collections.defaultdict(list)
+        self.erros = collections.Counter()
+        self.confirmados = set()  # (aba, email, categoria, fornecedor)
+
+    def registrar(self, operacao, inicio, chamadas, erro=None, chave=None):
+        duracao = time.perf_counter() - inicio
+        with self._trava:
+            if erro is not None:
+                # ErroPlanilha traz o erro da API em __cause__
+                causa = erro.__cause__ or erro
+                nome = type(erro).__name__
+                if causa is not erro:
+                    nome += f" ({type(causa).__name__})"
+                codigo = getattr(causa, "code", None)
+                self.erros[f"{operacao}: {nome}{f' {codigo}' if codigo else ''}"] += 1
+                return
+            self.latencias[operacao].append(duracao)
+            self.chamadas[operacao].append(chamadas)
+            if chave is not None:
+                self.confirmados.add(chave)
+
+def _medir(resultados, operacao, funcao, chave=None):
+    contador = [0]
+    _chamadas_operacao.set(contador)
+    inicio = time.perf_counter()
+    try:
+        retorno = funcao()
+    except Exception as e:  # falha entra no relatório
+        resultados.registrar(operacao, inicio, contador[0], erro=e)
+        return None
+    if chave is not None and retorno is not None:
+        chave = (retorno[0],) + chave
+    resultados.registrar(operacao, inicio, contador[0], chave=chave)
+    return retorno
+
+def _avaliador(indice, tarefa, perguntas_ref, args, resultados, rng):
+    """Um avaliador: envia as notas de cada fornecedor da sua categoria em sequência."""
+    email, tipo, categoria, fornecedores = tarefa
+    perguntas = perguntas_ref.get(tipo) or []
+    for fornecedor in fornecedores:
+        respostas = {q: rng.choice([1.0, 1.5, 2.0, 2.5, 3.0]) for q, _ in perguntas}
+
+        def enviar():
+            return planilhas.salvar_resposta_ponderada(
+                tipo, email, categoria, fornecedor, respostas, perguntas
+            )
+
+        chave = (email.lower(), categoria, fornecedor)
+        if rng.random() < args.envios_duplicados:
+            # Mesmo envio por duas abas do navegador ao mesmo tempo
+            paralelo = threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(_medir, resultados, "envio", enviar, chave),
+            )
+            paralelo.start()
+            _medir(resultados, "envio", enviar, chave)
+            paralelo.join()
+        else:
+            _medir(resultados, "envio", enviar, chave)
+        time.sleep(rng.uniform(0, args.pausa_ms / 1000.0))
+
+def _painel_admin(perguntas_ref, acessos, categorias):
+    df = planilhas.obter_todas_respostas()
+    if df.empty:
+        return None
+    total, respondidas, total_perguntas = calcular_totais(df, perguntas_ref)
+    df["Total Ponderado (recalc)"] = total
+    calcular_top3(df)
+    calcular_contagem(df, respondidas, total_perguntas)
+    calcular_progresso(df, acessos, categorias)
+    return df
+
+def _admin(perguntas_ref, acessos, categorias, args, resultados, parar):
+    while not parar.is_set():
+        _medir(resultados, "painel", lambda: _painel_admin(perguntas_ref, acessos, categorias))
+        parar.wait(args.intervalo_admin_s)
+
+def montar_tarefas(acessos, categorias, n_avaliadores, n_fornecedores, rng):
+    """
+    (email, tipo, categoria, fornecedores) por avaliador simulado, sorteando
+    tipo e categoria entre as linhas de Acessos.
+    """
+    atribuicoes = [
+        (str(a).strip(), str(c).strip())
+        for a, c in zip(acessos.iloc[:, 1], acessos.iloc[:, 2])
+        if str(a).strip() and str(c).strip()
+    ]
+    por_categoria = collections.defaultdict(list)
+    for cat, forn in zip(categorias.iloc[:, 0], categorias.iloc[:, 1]):
+        if str(forn).strip():
+            por_categoria[str(cat).strip()].append(str(forn).strip())
+    atribuicoes = [(t, c) for t, c in atribuicoes if por_categoria.get(c)]
+    tarefas = []
+    for i in range(n_avaliadores):
+        tipo, categoria = rng.choice(atribuicoes)
+        tipo = next((t for t in TIPOS_LOGICOS if t.lower() == tipo.lower()), tipo)
+        fornecedores = por_categoria[categoria][:n_fornecedores]
+        tarefas.append((f"carga{i:04d}@teste", tipo, categoria, fornecedores))
+    return tarefas
+
+def _executar_carga(args, backend, rng):
+    """Avaliadores e administradores em paralelo contra o cliente em uso. Retorna (resultados, duração)."""
+    perguntas_ref, acessos, categorias = planilhas.carregar_base()
+    tarefas = montar_tarefas(acessos, categorias, args.avaliadores, args.fornecedores, rng)
+    backend.chamadas.clear()
+
+    resultados = Resultados()
+    parar = threading.Event()
+    admins = [
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_admin, perguntas_ref, acessos, categorias, args, resultados, parar),
+        )
+        for _ in range(args.admins)
+    ]
+    inicio = time.perf_counter()
+    for t in admins:
+        t.start()
+    with ThreadPoolExecutor(max_workers=max(1, args.avaliadores)) as executor:
+        futuros = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _avaliador, i, tarefa, perguntas_ref, args, resultados,
+                random.Random(args.semente * 100003 + i),
+            )
+            for i, tarefa in enumerate(tarefas)
+        ]
+        for f in futuros:
+            f.result()
+    parar.set()
+    for t in admins:
+        t.join()
+    duracao = time.perf_counter() - inicio
+    return resultados, duracao
+
+# --------------------------------------------------------------------------------
+# Integridade e relatório
+# --------------------------------------------------------------------------------
+def verificar_integridade(cliente_memoria, resultados):
+    """Chaves repetidas por aba e envios confirmados ausentes da planilha."""
+    planilha = cliente_memoria.open_by_key(planilhas.RESPOSTAS_ID)
+    duplicadas, presentes = {}, set()
+    for aba in planilha.worksheets():
+        valores = aba.get_all_values()
+        if not valores or "E-mail" not in valores[0]:
+            continue
+        cab = valores[0]
+        i_email, i_cat, i_forn = cab.index("E-mail"), cab.index("Categoria"), cab.index("Fornecedor")
+        contagem = collections.Counter(
+            (aba.title, v[i_email].strip().lower(), v[i_cat], v[i_forn]) for v in valores[1:]
+        )
+        presentes.update(contagem)
+        repetidas = {k: n for k, n in contagem.items() if n > 1 and k[1].startswith("carga")}
+        if repetidas:
+            duplicadas[aba.title] = repetidas
+    perdidas = resultados.confirmados - presentes
+    return duplicadas, perdidas
+
+def _percentis(valores):
+    if not valores:
+        return "-"
+    p50, p95, p99 = np.percentile(np.asarray(valores) * 1000.0, [50, 95, 99])
+    return f"p50 {p50:.0f} ms | p95 {p95:.0f} ms | p99 {p99:.0f} ms"
+
+def relatorio(resultados, backend, duracao, duplicadas, perdidas):
+    linhas = [f"Duração: {duracao:.1f} s"]
+    for operacao in ("envio", "painel"):
+        ok = len(resultados.latencias[operacao])
+        falhas = sum(n for k, n in resultados.erros.items() if k.startswith(operacao))
+        if not ok and not falhas:
+            continue
+        chamadas = resultados.chamadas[operacao]
+        linhas.append(
+            f"{operacao.capitalize()}: {ok} ok, {falhas} com erro, "
+            f"{ok / duracao:.1f}/s | {_percentis(resultados.latencias[operacao])} | "
+            f"{(np.mean(chamadas) if chamadas else 0):.1f} chamadas à API por {operacao}"
+        )
+    linhas.append(
+        f"Chamadas à API: {sum(backend.chamadas.values())} "
+        f"({', '.join(f'{k}: {n}' for k, n in backend.chamadas.most_common())}); "
+        f"recusadas pelo limite: {backend.recusadas}"
+    )
+    for erro, n in resultados.erros.most_common():
+        linhas.append(f"  erro {erro}: {n}")
+    n_dup = sum(n - 1 for rep in duplicadas.values() for n in rep.values())
+    linhas.append(
+        f"Integridade: {n_dup} linha(s) duplicada(s) em "
+        f"{sum(len(r) for r in duplicadas.values())} chave(s); "
+        f"{len(perdidas)} envio(s) confirmado(s) ausente(s)"
+    )
+    for aba, repetidas in duplicadas.items():
+        for (_, email, cat, forn), n in list(repetidas.items())[:5]:
+            linhas.append(f"  {aba}: {email} / {cat} / {forn} x{n}")
+    return "\n".join(linhas)
+
+# --------------------------------------------------------------------------------
+# Linha de comando
+# --------------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Teste de carga de envios e do painel admin contra um Google Sheets falso em memória."
+    )
+    parser.add_argument("--avaliadores", type=int, default=200, help="avaliadores simultâneos (padrão: 200)")
+    parser.add_argument("--fornecedores", type=int, default=3, help="envios por avaliador (padrão: 3)")
+    parser.add_argument("--admins", type=int, default=2, help="administradores abrindo o painel em laço (padrão: 2)")
+    parser.add_argument("--intervalo-admin-s", type=float, default=1.0, help="pausa entre aberturas do painel (padrão: 1)")
+    parser.add_argument("--latencia-ms", type=float, default=100.0, help="latência média por chamada (padrão: 100)")
+    parser.add_argument("--variacao-ms", type=float, default=50.0, help="variação uniforme da latência (padrão: 50)")
+    parser.add_argument(
+        "--limite-por-minuto", type=int, default=0,
+        help="chamadas à API por minuto antes do HTTP 429 (padrão: 0 = sem limite)",
+    )
+    parser.add_argument(
+        "--envios-duplicados", type=float, default=0.0,
+        help="fração de envios disparados duas vezes ao mesmo tempo (padrão: 0)",
+    )
+    parser.add_argument("--pausa-ms", type=float, default=500.0, help="pausa máxima entre envios do mesmo avaliador")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--json", help="grava também as métricas em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.semente)
+    memoria = cliente_offline(planilhas.ARQUIVOS_OFFLINE, os.path.dirname(os.path.abspath(__file__)))
+    backend = BackendFalso(
+        memoria, args.latencia_ms, args.variacao_ms, args.limite_por_minuto, args.semente
+    )
+    with planilhas.usar_cliente_sheets(backend):
+        resultados, duracao = _executar_carga(args, backend, rng)
+    duplicadas, perdidas = verificar_integridade(memoria, resultados)
+    print(relatorio(resultados, backend, duracao, duplicadas, perdidas))
+    if args.json:
+        metricas = {
+            "duracao_s": duracao,
+            "operacoes": {
+                op: {
+                    "ok": len(lat),
+                    "por_segundo": len(lat) / duracao,
+                    "p50_ms": float(np.percentile(lat, 50) * 1000) if lat else None,
+                    "p95_ms": float(np.percentile(lat, 95) * 1000) if lat else None,
+                    "p99_ms": float(np.percentile(lat, 99) * 1000) if lat else None,
+                    "chamadas_por_operacao": float(np.mean(resultados.chamadas[op])) if lat else None,
+                }
+                for op, lat in resultados.latencias.items()
+            },
+            "erros": dict(resultados.erros),
+            "chamadas_api": dict(backend.chamadas),
+            "recusadas_pelo_limite": backend.recusadas,
+            "chaves_duplicadas": sum(len(r) for r in duplicadas.values()),
+            "envios_ausentes": len(perdidas),
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(metricas, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Stand-in local da API do Google Sheets (v4) para os testes.
+
+Servidor HTTP numa thread que atende o que o gspread usa por trás de
+ClienteSheetsAsync: metadados da planilha (open_by_key / worksheets),
+:batchUpdate (criar aba e mudar o número de colunas), values:batchGet,
+values/<intervalo>:append e values:batchUpdate. As abas ficam em memória;
+dá para atrasar respostas por aba, forçar erros HTTP e consultar as
+requisições recebidas e o pico de requisições simultâneas.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import gspread
+import requests
+from gspread.utils import a1_range_to_grid_range
+
+URL_API = "https://sheets.googleapis.com"
+
+ROTAS = [
+    ("GET", re.compile(r"^/v4/spreadsheets/([^/:]+)$"), "_metadados"),
+    ("POST", re.compile(r"^/v4/spreadsheets/([^/:]+):batchUpdate$"), "_atualizar_planilha"),
+    ("GET", re.compile(r"^/v4/spreadsheets/([^/:]+)/values:batchGet$"), "_batch_get"),
+    ("POST", re.compile(r"^/v4/spreadsheets/([^/:]+)/values/(.+):append$"), "_append"),
+    ("POST", re.compile(r"^/v4/spreadsheets/([^/:]+)/values:batchUpdate$"), "_batch_update"),
+]
+
+class ErroApi(Exception):
+    def __init__(self, codigo, mensagem, status):
+        super().__init__(mensagem)
+        self.codigo, self.mensagem, self.status = codigo, mensagem, status
+
+def _separar_intervalo(intervalo):
+    """"'Aba'!A2:F2" -> ("Aba", "A2:F2")."""
+    aba, sep, a1 = intervalo.rpartition("!")
+    if not sep:
+        aba, a1 = intervalo, ""
+    if aba.startswith("'") and aba.endswith("'"):
+        aba = aba[1:-1].replace("''", "'")
+    return aba, a1
+
+def _texto(valor):
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return "" if valor is None else str(valor)
+
+class ServidorSheets:
+    """
+    - planilhas: {sheet_id: {aba: linhas}}
+    - atrasos: {aba: segundos} aplicados às leituras e escritas da aba
+    - falhas: códigos HTTP devolvidos, em ordem, pelas próximas requisições
+    """
+
+    def __init__(self, planilhas, atrasos=None):
+        self.planilhas = {
+            sid: {aba: [list(l) for l in linhas] for aba, linhas in abas.items()}
+            for sid, abas in planilhas.items()
+        }
+        self.atrasos = dict(atrasos or {})
+        self.colunas = {}  # {(sheet_id, aba): número de colunas}; padrão 26
+        self.falhas = []
+        self.requisicoes = []
+        self.em_andamento = 0
+        self.pico_em_andamento = 0
+        self._trava = threading.Lock()
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), self._manipulador())
+        self._http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}"
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def cliente(self):
+        """gspread.Client apontado para este servidor."""
+        return gspread.Client(None, session=_SessaoLocal(self.url))
+
+    def contar(self, nome_rota):
+        with self._trava:
+            return sum(1 for _, rota in self.requisicoes if rota == nome_rota)
+
+    # ----------------------------------------------------------------------------
+    # Atendimento
+    # ----------------------------------------------------------------------------
+    def _manipulador(self):
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                servidor._atender(self, "GET")
+
+            def do_POST(self):
+                servidor._atender(self, "POST")
+
+        return Manipulador
+
+    def _atender(self, req, metodo):
+        partes = urlsplit(req.path)
+        corpo = None
+        if metodo == "POST":
+            tamanho = int(req.headers.get("Content-Length") or 0)
+            corpo = json.loads(req.rfile.read(tamanho) or b"{}")
+        with self._trava:
+            self.em_andamento += 1
+            self.pico_em_andamento = max(self.pico_em_andamento, self.em_andamento)
+            falha = self.falhas.pop(0) if self.falhas else None
+        try:
+            for metodo_rota, padrao, nome in ROTAS:
+                encontrado = padrao.match(partes.path)
+                if metodo_rota == metodo and encontrado:
+                    with self._trava:
+                        self.requisicoes.append((metodo, nome))
+                    if falha:
+                        raise ErroApi(falha, "Falha simulada", "UNAVAILABLE")
+                    args = [unquote(g) for g in encontrado.groups()]
+                    resposta = getattr(self, nome)(*args, parse_qs(partes.query), corpo)
+                    self._responder(req, 200, resposta)
+                    return
+            raise ErroApi(404, f"Rota desconhecida: {metodo} {partes.path}", "NOT_FOUND")
+        except ErroApi as e:
+            self._responder(
+                req, e.codigo,
+                {"error": {"code": e.codigo, "message": e.mensagem, "status": e.status}},
+            )
+        finally:
+            with self._trava:
+                self.em_andamento -= 1
+
+    def _responder(self, req, codigo, dados):
+        conteudo = json.dumps(dados).encode()
+        req.send_response(codigo)
+        req.send_header("Content-Type", "application/json")
+        req.send_header("Content-Length", str(len(conteudo)))
+        req.end_headers()
+        req.wfile.write(conteudo)
+
+    def _planilha(self, sheet_id):
+        if sheet_id not in self.planilhas:
+            raise ErroApi(404, f"Planilha {sheet_id} não encontrada", "NOT_FOUND")
+        return self.planilhas[sheet_id]
+
+    def _aba(self, sheet_id, intervalo):
+        aba, a1 = _separar_intervalo(intervalo)
+        abas = self._planilha(sheet_id)
+        if aba not in abas:
+            raise ErroApi(400, f"Unable to parse range: {intervalo}", "INVALID_ARGUMENT")
+        time.sleep(self.atrasos.get(aba, 0.0))
+        return abas[aba], a1
+
+    # ----------------------------------------------------------------------------
+    # Endpoints
+    # ----------------------------------------------------------------------------
+    def _metadados(self, sheet_id, params, corpo):
+        abas = self._planilha(sheet_id)
+        return {
+            "spreadsheetId": sheet_id,
+            "properties": {"title": f"Planilha {sheet_id}"},
+            "sheets": [
+                {
+                    "properties": {
+                        "sheetId": i,
+                        "title": titulo,
+                        "index": i,
+                        "sheetType": "GRID",
+                        "gridProperties": {
+                            "rowCount": 1000,
+                            "columnCount": self.colunas.get((sheet_id, titulo), 26),
+                        },
+                    }
+                }
+                for i, titulo in enumerate(abas)
+            ],
+        }
+
+    def _atualizar_planilha(self, sheet_id, params, corpo):
+        abas = self._planilha(sheet_id)
+        respostas = []
+        for pedido in corpo.get("requests", []):
+            if "addSheet" in pedido:
+                props = pedido["addSheet"]["properties"]
+                titulo = props["title"]
+                with self._trava:
+                    if titulo in abas:
+                        raise ErroApi(
+                            400, f'A sheet with the name "{titulo}" already exists.',
+                            "INVALID_ARGUMENT",
+                        )
+                    abas[titulo] = []
+                    indice = len(abas) - 1
+                    self.colunas[(sheet_id, titulo)] = int(props["gridProperties"]["columnCount"])
+                respostas.append(
+                    {"addSheet": {"properties": dict(props, sheetId=indice, index=indice)}}
+                )
+            elif "updateSheetProperties" in pedido:
+                props = pedido["updateSheetProperties"]["properties"]
+                titulo = list(abas)[props["sheetId"]]
+                colunas = props["gridProperties"].get("columnCount")
+                if colunas is not None:
+                    with self._trava:
+                        self.colunas[(sheet_id, titulo)] = int(colunas)
+                respostas.append({})
+            else:
+                raise ErroApi(400, f"Pedido não suportado: {list(pedido)}", "INVALID_ARGUMENT")
+        return {"spreadsheetId": sheet_id, "replies": respostas}
+
+    def _batch_get(self, sheet_id, params, corpo):
+        intervalos = []
+        for intervalo in params.get("ranges", []):
+            linhas, _ = self._aba(sheet_id, intervalo)
+            with self._trava:
+                valores = [list(l) for l in linhas]
+            intervalos.append({"range": intervalo, "values": valores})
+        return {"spreadsheetId": sheet_id, "valueRanges": intervalos}
+
+    def _append(self, sheet_id, intervalo, params, corpo):
+        linhas, _ = self._aba(sheet_id, intervalo)
+        novas = [[_texto(v) for v in linha] for linha in corpo.get("values", [])]
+        with self._trava:
+            linhas.extend(novas)
+        return {"spreadsheetId": sheet_id, "updates": {"updatedRows": len(novas)}}
+
+    def _batch_update(self, sheet_id, params, corpo):
+        total = 0
+        for dado in corpo.get("data", []):
+            linhas, a1 = self._aba(sheet_id, dado["range"])
+            grade = a1_range_to_grid_range(a1) if a1 else {}
+            lin0 = grade.get("startRowIndex", 0)
+            col0 = grade.get("startColumnIndex", 0)
+            with self._trava:
+                for i, valores in enumerate(dado["values"]):
+                    while len(linhas) <= lin0 + i:
+                        linhas.append([])
+                    atual = linhas[lin0 + i]
+                    atual.extend([""] * (col0 + len(valores) - len(atual)))
+                    atual[col0:col0 + len(valores)] = [_texto(v) for v in valores]
+            total += len(dado["values"])
+        return {"spreadsheetId": sheet_id, "totalUpdatedRows": total}
+
+class _SessaoLocal(requests.Session):
+    """Sessão que troca o endereço da API do Google pelo do servidor local."""
+
+    def __init__(self, url_base):
+        super().__init__()
+        self._url_base = url_base
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, url.replace(URL_API, self._url_base), *args, **kwargs)
@@ -0,0 +1,116 @@
+"""Leitura dos arquivos locais da apuração por linha de comando."""
+import openpyxl
+import pandas as pd
+import pytest
+
+from apurar_premiacao import (
+    ler_acessos_arquivo,
+    ler_categorias_arquivo,
+    ler_perguntas_arquivo,
+    ler_respostas_arquivo,
+    ler_tabela,
+    main,
+)
+
+# Cabeçalho como o das abas de respostas: perguntas com quebra de linha
+PERGUNTA = "Clima:\nComo o fornecedor está gerenciando as emissões de carbono (medindo, reduzindo)"
+
+def _respostas():
+    return pd.DataFrame(
+        {
+            "Data": ["01/02/2025", "02/02/2025"],
+            "Hora": ["10:00:00", "11:00:00"],
+            "E-mail": ["a@x", "b@x"],
+            "Categoria": ["3PL", "3PL"],
+            "Fornecedor": ["F1", "F2"],
+            PERGUNTA: ["2,5", "3"],
+            PERGUNTA + " (PONDERADA)": ["0,125", "0,15"],
+            "Tipo": ["ESG", "ESG"],
+        }
+    )
+
+@pytest.mark.parametrize("sep", [",", ";"])
+def test_csv_com_cabecalho_em_varias_linhas(tmp_path, sep):
+    caminho = tmp_path / "respostas.csv"
+    _respostas().to_csv(caminho, sep=sep, index=False)
+    df = ler_tabela(caminho)
+    assert list(df.columns) == list(_respostas().columns)
+    assert df[PERGUNTA].tolist() == ["2,5", "3"]
+
+def test_respostas_csv_exportado_relido(tmp_path):
+    caminho = tmp_path / "avaliacoes_esg.csv"
+    _respostas().to_csv(caminho, index=False, encoding="utf-8-sig")
+    df = ler_respostas_arquivo(caminho)
+    assert len(df) == 2
+    assert df["Fornecedor"].astype(str).tolist() == ["F1", "F2"]
+    assert set(df["Tipo"].astype(str)) == {"ESG"}
+
+def test_pesos_do_xlsx_como_o_sheets_exibe(tmp_path):
+    caminho = tmp_path / "perguntas.xlsx"
+    pasta = openpyxl.Workbook()
+    aba = pasta.active
+    aba.append(["Comercial", "Peso_Comercial"])
+    # Porcentagem formatada, número sem formato (15 -> 15%) e texto
+    for pergunta, peso, formato in [
+        ("Preço", 0.6, "0%"), ("Prazo", 25, "General"), ("Suporte", "15%", "@")
+    ]:
+        aba.append([pergunta, peso])
+        aba.cell(aba.max_row, 2).number_format = formato
+    pasta.save(caminho)
+    perguntas = ler_perguntas_arquivo(caminho)["Comercial"]
+    assert [(q, round(p, 10)) for q, p in perguntas] == [
+        ("Preço", 0.6), ("Prazo", 0.25), ("Suporte", 0.15)
+    ]
+
+def test_acessos_e_categorias_pelas_abas_do_xlsx(tmp_path):
+    caminho = tmp_path / "acessos.xlsx"
+    with pd.ExcelWriter(caminho) as escritor:
+        pd.DataFrame({"x": [1]}).to_excel(escritor, sheet_name="Capa", index=False)
+        pd.DataFrame({"E-mail": ["a@x"], "Avaliação": ["ESG"], "Categoria": ["3PL"]}).to_excel(
+            escritor, sheet_name="Acessos", index=False
+        )
+    assert ler_acessos_arquivo(caminho)["E-mail"].tolist() == ["a@x"]
+    assert ler_categorias_arquivo(caminho) is None
+
+# --------------------------------------------------------------------------------
+# Acessos × Categorias na linha de comando
+# --------------------------------------------------------------------------------
+def _arquivos_base(tmp_path):
+    perguntas = tmp_path / "perguntas.csv"
+    pd.DataFrame({"ESG": [PERGUNTA], "Peso_ESG": ["100%"]}).to_csv(perguntas, index=False)
+    respostas = tmp_path / "respostas.csv"
+    _respostas().to_csv(respostas, index=False)
+    acessos = tmp_path / "acessos.csv"
+    pd.DataFrame({"E-mail": ["A@x "], "Avaliação": ["ESG"], "Categoria": ["3PL"]}).to_csv(
+        acessos, index=False
+    )
+    categorias = tmp_path / "categorias.csv"
+    pd.DataFrame({"Categoria": ["3PL", "3PL"], "Razão Social": ["F1", "F3"]}).to_csv(
+        categorias, index=False
+    )
+    return perguntas, respostas, acessos, categorias
+
+def test_acessos_csv_sem_categorias_avisa_e_nao_gera_progresso(tmp_path, capsys):
+    perguntas, respostas, acessos, _ = _arquivos_base(tmp_path)
+    saida = tmp_path / "saida"
+    main(["--perguntas", str(perguntas), "--acessos", str(acessos),
+          "--saida", str(saida), f"c={respostas}"])
+    assert "não é um XLSX com a aba Categorias" in capsys.readouterr().err
+    assert not list((saida / "c").glob("progresso_*.csv"))
+
+def test_acessos_csv_com_categorias_gera_progresso(tmp_path):
+    perguntas, respostas, acessos, categorias = _arquivos_base(tmp_path)
+    saida = tmp_path / "saida"
+    main(["--perguntas", str(perguntas), "--acessos", str(acessos),
+          "--categorias", str(categorias), "--saida", str(saida), f"c={respostas}"])
+    progresso = pd.read_csv(saida / "c" / "progresso_por_avaliador.csv")
+    assert progresso[["E-mail", "Esperadas", "Enviadas"]].values.tolist() == [["a@x", 2, 1]]
+
+def test_categorias_xlsx_sem_a_aba_e_erro(tmp_path):
+    perguntas, respostas, acessos, _ = _arquivos_base(tmp_path)
+    sem_aba = tmp_path / "sem_aba.xlsx"
+    pd.DataFrame({"x": [1]}).to_excel(sem_aba, sheet_name="Outra", index=False)
+    with pytest.raises(SystemExit) as saida:
+        main(["--perguntas", str(perguntas), "--acessos", str(acessos),
+              "--categorias", str(sem_aba), f"c={respostas}"])
+    assert saida.value.code == 2
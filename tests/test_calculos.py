@@ -0,0 +1,181 @@
+"""Regras de apuração (calculos.py)."""
+import pandas as pd
+import pytest
+
+from calculos import (
+    COLUNAS_FIXAS,
+    _converter_peso,
+    base_simulacao_pesos,
+    bootstrap_notas_finais,
+    calcular_progresso,
+    calcular_top3,
+    calcular_totais,
+    compactar_respostas,
+    esquema_aba,
+    ordenar_ranking,
+    perguntas_de_df,
+    simular_pesos,
+)
+
+PERGUNTAS = {
+    "Comercial": [("C1", 0.6), ("C2", 0.4)],
+    "Técnica": [("T1", 1.0)],
+    "ESG": [("E1", 1.0)],
+}
+
+def _respostas(linhas):
+    """linhas: (tipo, email, categoria, fornecedor, {pergunta: nota em texto})."""
+    colunas = [q for lista in PERGUNTAS.values() for q, _ in lista]
+    registros = [
+        {
+            "Data": "01/02/2025", "Hora": "10:00:00", "E-mail": email,
+            "Categoria": categoria, "Fornecedor": fornecedor,
+            **{q: notas.get(q, "") for q in colunas}, "Tipo": tipo,
+        }
+        for tipo, email, categoria, fornecedor, notas in linhas
+    ]
+    df = compactar_respostas(pd.DataFrame(registros, columns=COLUNAS_FIXAS + colunas + ["Tipo"]))
+    df["Total Ponderado (recalc)"] = calcular_totais(df, PERGUNTAS)[0]
+    return df
+
+# --------------------------------------------------------------------------------
+# Pesos e esquema das abas
+# --------------------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "valor, peso", [("15%", 0.15), ("15", 0.15), (15, 0.15), (" 7,5% ", 0.075), ("x", 0.0)]
+)
+def test_converter_peso(valor, peso):
+    assert _converter_peso(valor) == pytest.approx(peso)
+
+def test_perguntas_de_df_ignora_vazias_e_peso_zero():
+    df = pd.DataFrame(
+        {
+            "Comercial": ["Preço", "", "Prazo", "Suporte"],
+            "Peso_Comercial": ["60%", "10%", "0%", "40"],
+            "ESG": ["Clima", None, None, None],
+            "Peso_ESG": ["100%", None, None, None],
+        }
+    )
+    assert perguntas_de_df(df) == {
+        "Comercial": [("Preço", 0.6), ("Suporte", 0.4)],
+        "Técnica": [],
+        "ESG": [("Clima", 1.0)],
+    }
+
+def test_esquema_sem_drift_quando_o_cabecalho_bate():
+    perguntas = PERGUNTAS["Comercial"]
+    esperado = COLUNAS_FIXAS + ["C1", "C2", "C1 (PONDERADA)", "C2 (PONDERADA)"]
+    esquema = esquema_aba(perguntas, esperado)
+    assert not esquema["drift"] and not esquema["cabecalho_alterado"]
+    # Aba nova: cabeçalho a gravar, mas não é divergência
+    novo = esquema_aba(perguntas, [])
+    assert list(novo["headers"]) == esperado
+    assert novo["cabecalho_alterado"] and not novo["drift"]
+
+def test_esquema_detecta_faltantes_extras_e_duplicadas():
+    headers = COLUNAS_FIXAS + ["C1", "Antiga", "C1", "C1 (PONDERADA)", "Tipo"]
+    esquema = esquema_aba(PERGUNTAS["Comercial"], headers)
+    assert esquema["drift"] and esquema["cabecalho_alterado"]
+    assert esquema["faltantes"] == ("C2", "C2 (PONDERADA)")
+    assert esquema["extras"] == ("Antiga",)
+    assert esquema["duplicadas"] == ("C1",)
+    # Faltantes vão para o fim; a primeira ocorrência da repetida vale
+    assert list(esquema["headers"]) == headers + ["C2", "C2 (PONDERADA)"]
+    assert esquema["pos_perguntas"].tolist() == [5, 10]
+
+# --------------------------------------------------------------------------------
+# Ranking, Top 3 e simulação de pesos
+# --------------------------------------------------------------------------------
+def test_ordenar_ranking_empate_pelo_fornecedor_sem_residuo_de_ponto_flutuante():
+    df = pd.DataFrame(
+        {
+            "Categoria": ["X", "X", "X"],
+            "Fornecedor": ["B", "A", "C"],
+            "Nota Final": [0.1 + 0.2, 0.3, 0.5],
+        }
+    )
+    assert ordenar_ranking(df)["Fornecedor"].tolist() == ["C", "A", "B"]
+
+def _respostas_ranking():
+    linhas = []
+    for categoria, fornecedor, c1, t1, e1 in [
+        ("X", "D", "3", "3", "1"),
+        ("X", "B", "2", "2", "2"),  # empata com A e C na Nota Final
+        ("X", "A", "2", "2", "2"),
+        ("X", "C", "2", "3", "1"),
+        ("X", "E", "1", "1", "1"),
+        ("Y", "F", "1", "1", "1"),
+    ]:
+        linhas += [
+            ("Comercial", "c@x", categoria, fornecedor, {"C1": c1, "C2": c1}),
+            ("Técnica", "t@x", categoria, fornecedor, {"T1": t1}),
+            ("ESG", "e@x", categoria, fornecedor, {"E1": e1}),
+        ]
+    return _respostas(linhas)
+
+def test_top3_com_empates_decididos_pelo_fornecedor():
+    top3 = calcular_top3(_respostas_ranking())
+    assert top3[["Categoria", "Fornecedor"]].astype(str).values.tolist() == [
+        ["X", "D"], ["X", "A"], ["X", "B"], ["Y", "F"]
+    ]
+    assert top3["Nota Final"].tolist() == [2.333333, 2.0, 2.0, 1.0]
+
+def test_simulacao_com_pesos_oficiais_reproduz_o_top3():
+    df = _respostas_ranking()
+    base = base_simulacao_pesos(df, PERGUNTAS)
+    oficiais = {t: [p for _, p in lista] for t, lista in PERGUNTAS.items()}
+    simulado = simular_pesos(base, oficiais)
+    primeiros = simulado[simulado["Posição"] <= 3].sort_values(["Categoria", "Posição"])
+    top3 = calcular_top3(df)
+    assert (
+        primeiros[["Categoria", "Fornecedor"]].values.tolist()
+        == top3[["Categoria", "Fornecedor"]].astype(str).values.tolist()
+    )
+    assert primeiros["Nota Final"].round(6).tolist() == top3["Nota Final"].tolist()
+
+# --------------------------------------------------------------------------------
+# Progresso das atribuições
+# --------------------------------------------------------------------------------
+def test_progresso_ignora_maiusculas_e_espacos():
+    acessos = pd.DataFrame(
+        {"E-mail": [" Ana@X.com "], "Avaliação": ["comercial"], "Categoria": [" X "]}
+    )
+    categorias = pd.DataFrame({"Categoria": ["X", "X "], "Razão Social": [" F1", "F2"]})
+    respostas = _respostas([("Comercial", "ANA@x.com", "X", "F1 ", {"C1": "2"})])
+    pendentes, por_avaliador, por_categoria = calcular_progresso(respostas, acessos, categorias)
+    assert pendentes.values.tolist() == [["ana@x.com", "Comercial", "X", "F2"]]
+    assert por_avaliador[["E-mail", "Esperadas", "Enviadas", "Pendentes"]].values.tolist() == [
+        ["ana@x.com", 2, 1, 1]
+    ]
+    assert por_categoria["Progresso (%)"].tolist() == [50.0]
+
+# --------------------------------------------------------------------------------
+# Bootstrap
+# --------------------------------------------------------------------------------
+def test_bootstrap_deterministico_pela_semente():
+    df = _respostas_ranking()
+    df = pd.concat([df, _respostas([("ESG", "f@x", "X", "A", {"E1": "3"})])])
+    primeiro = bootstrap_notas_finais(df, n_replicas=500, semente=7)
+    assert primeiro.equals(bootstrap_notas_finais(df, n_replicas=500, semente=7))
+    assert not primeiro.equals(bootstrap_notas_finais(df, n_replicas=500, semente=8))
+    assert primeiro.groupby("Categoria")["P(1º lugar)"].sum().tolist() == [1.0, 1.0]
+
+def _respostas_empatadas():
+    # Só avaliações comerciais: Nota Final 2,05 / 3 para os três
+    linhas = [
+        ("Foods", f, "Comercial", nota)
+        for f in ["RESOLV", "SAPORE", "VIVA FOOD"]
+        for nota in [2.0, 2.1]
+    ]
+    return pd.DataFrame(
+        linhas, columns=["Categoria", "Fornecedor", "Tipo", "Total Ponderado (recalc)"]
+    )
+
+def test_bootstrap_divide_o_primeiro_lugar_entre_empatados():
+    estat = bootstrap_notas_finais(_respostas_empatadas(), n_replicas=3000, semente=1)
+    assert estat["P(Top 3)"].tolist() == [1.0, 1.0, 1.0]
+    assert estat["P(1º lugar)"].sum() == 1.0
+    assert all(abs(p - 1 / 3) < 0.05 for p in estat["P(1º lugar)"])
+    # IC arredondado como as notas
+    assert estat["IC 95% Superior"].tolist() == [0.7] * 3
+    assert estat["IC 95% Inferior"].tolist() == [0.666667] * 3
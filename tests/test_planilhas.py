@@ -0,0 +1,152 @@
+"""Camada de dados (planilhas.py) contra o stand-in local da API do Sheets."""
+import contextvars
+import threading
+
+import pytest
+
+import planilhas
+from planilhas import RESPOSTAS_ID, ErroPlanilha
+from servidor_sheets import ErroApi, ServidorSheets
+
+PERGUNTAS = [("Q1", 0.05), ("Q2", 0.15)]
+
+@pytest.fixture
+def servidor():
+    with ServidorSheets({RESPOSTAS_ID: {"Comercial": []}}) as s:
+        yield s
+
+def _salvar(email="a@x", q1=3, q2=2.5):
+    return planilhas.salvar_resposta_ponderada(
+        "Comercial", email, "3PL", "F", {"Q1": q1, "Q2": q2}, PERGUNTAS
+    )
+
+def test_cliente_vale_so_dentro_do_bloco(servidor):
+    padrao = planilhas._sheets()
+    with planilhas.usar_cliente_sheets(servidor.cliente()) as sheets:
+        assert planilhas._sheets() is sheets
+        with planilhas.usar_cliente_sheets(servidor.cliente()) as interno:
+            assert planilhas._sheets() is interno
+        assert planilhas._sheets() is sheets
+    assert planilhas._sheets() is padrao
+
+def test_threads_com_copia_do_contexto_herdam_o_cliente(servidor):
+    vistos = []
+    with planilhas.usar_cliente_sheets(servidor.cliente()) as sheets:
+        t = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(lambda: vistos.append(planilhas._sheets()),),
+        )
+        t.start()
+        t.join()
+    assert vistos == [sheets]
+
+def test_cache_de_respostas_proprio_de_cada_cliente(servidor):
+    with planilhas.usar_cliente_sheets(servidor.cliente()):
+        _salvar()
+        assert len(planilhas.obter_df_resposta("Comercial")[0]) == 1
+    servidor.planilhas[RESPOSTAS_ID]["Comercial"] = []
+    with planilhas.usar_cliente_sheets(servidor.cliente()):
+        assert planilhas.obter_df_resposta("Comercial")[0].empty
+
+def _ordenado(df):
+    return df.astype(str).sort_values(["E-mail"]).reset_index(drop=True)
+
+def test_cache_igual_a_releitura_depois_de_gravar(servidor):
+    with planilhas.usar_cliente_sheets(servidor.cliente()):
+        planilhas.obter_df_resposta("Comercial")  # aba em cache antes dos envios
+        _salvar()
+        _salvar(q1=1.5)  # mesma chave: atualiza no lugar
+        _salvar(email="b@x")
+        em_cache, headers_cache = planilhas.obter_df_resposta("Comercial")
+        headers, linhas = planilhas.ler_linhas_brutas("Comercial")
+        assert linhas[0][-2:] == ["0.075", "0.375"]
+        planilhas.invalidar_cache_respostas()
+        relido, headers_relidos = planilhas.obter_df_resposta("Comercial")
+        assert headers_cache == headers_relidos == headers
+        assert _ordenado(em_cache).equals(_ordenado(relido))
+
+def test_cache_guarda_df_e_digest_sem_as_linhas_brutas(servidor):
+    with planilhas.usar_cliente_sheets(servidor.cliente()):
+        _salvar()
+        df, _ = planilhas.obter_df_resposta("Comercial")
+        entrada = planilhas._cache_respostas()["abas"]["Comercial"]
+        assert set(entrada) == {"df", "headers", "digest", "lido_em", "versao"}
+        # Releitura sem mudança na planilha: mesma versão e mesmo df
+        entrada["lido_em"] = 0
+        relido, _ = planilhas.obter_df_resposta("Comercial")
+        assert relido.attrs["versao"] == df.attrs["versao"]
+        assert planilhas._cache_respostas()["abas"]["Comercial"]["df"] is entrada["df"]
+
+def test_falha_ao_gravar_vira_erro_planilha(servidor, monkeypatch):
+    def _append_indisponivel(*args):
+        raise ErroApi(503, "Indisponível", "UNAVAILABLE")
+
+    with planilhas.usar_cliente_sheets(servidor.cliente()):
+        _salvar()
+        monkeypatch.setattr(servidor, "_append", _append_indisponivel)
+        with pytest.raises(ErroPlanilha) as erro:
+            _salvar(email="c@x")
+        assert erro.value.__cause__.code == 503
+        # A aba sai do cache: a próxima leitura vem da planilha
+        assert "Comercial" not in planilhas._cache_respostas()["abas"]
+
+def test_painel_le_todos_os_shards_existentes_do_ciclo(monkeypatch):
+    cabecalho = ["Data", "Hora", "E-mail", "Categoria", "Fornecedor", "Q1"]
+    abas = {
+        "Comercial - 2024": [cabecalho, ["", "", "a@x", "3PL", "F1", "2"]],
+        # Grupo que não está mais em GRUPOS_CATEGORIA
+        "Comercial - 2024 - Antigo": [cabecalho, ["", "", "b@x", "Foods", "F2", "3"]],
+        "Comercial - 2025": [cabecalho, ["", "", "c@x", "3PL", "F1", "1"]],
+        "Esg - 2024": [cabecalho, ["", "", "d@x", "3PL", "F1", "1"]],
+    }
+    monkeypatch.setattr(planilhas, "GRUPOS_CATEGORIA", {})
+    with ServidorSheets({RESPOSTAS_ID: abas}) as s, planilhas.usar_cliente_sheets(s.cliente()):
+        assert planilhas.ciclos_disponiveis() == ["2024", "2025"]
+        assert planilhas.shards_do_tipo("Comercial", "2024") == [
+            "Comercial - 2024", "Comercial - 2024 - Antigo"
+        ]
+        assert planilhas.shards_do_tipo("Técnica", "2024") == []
+        df = planilhas.obter_todas_respostas("2024")
+        assert sorted(df["E-mail"].astype(str)) == ["a@x", "b@x", "d@x"]
+
+# --------------------------------------------------------------------------------
+# Escrita sem chamadas de metadados da aba
+# --------------------------------------------------------------------------------
+def test_envios_usam_a_lista_de_abas_em_cache(servidor):
+    with planilhas.usar_cliente_sheets(servidor.cliente()):
+        _salvar()
+        metadados = servidor.contar("_metadados")
+        _salvar(email="b@x")
+        _salvar(q1=1.5)
+    assert servidor.contar("_metadados") == metadados
+    assert servidor.contar("_atualizar_planilha") == 0
+
+def test_aba_nova_criada_uma_vez_com_colunas_suficientes():
+    with ServidorSheets({RESPOSTAS_ID: {}}) as s, planilhas.usar_cliente_sheets(s.cliente()):
+        _salvar()
+        _salvar(email="b@x")
+        [(aba, linhas)] = s.planilhas[RESPOSTAS_ID].items()
+        assert len(linhas) == 3
+        assert s.colunas[(RESPOSTAS_ID, aba)] == planilhas.COLUNAS_ABA_NOVA
+        assert s.contar("_atualizar_planilha") == 1
+
+def test_aba_criada_por_outra_sessao_depois_da_listagem():
+    with ServidorSheets({RESPOSTAS_ID: {}}) as s, planilhas.usar_cliente_sheets(s.cliente()):
+        aba = planilhas.shard_da_categoria("Comercial", "3PL")
+        assert planilhas.ler_linhas_brutas(aba) is None  # lista em cache sem a aba
+        cabecalho = ["Data", "Hora", "E-mail", "Categoria", "Fornecedor", "Q1"]
+        s.planilhas[RESPOSTAS_ID][aba] = [cabecalho, ["", "", "b@x", "3PL", "F", "2"]]
+        _salvar()
+        linhas = s.planilhas[RESPOSTAS_ID][aba]
+        assert [l[2] for l in linhas] == ["E-mail", "b@x", "a@x"]
+
+def test_cabecalho_que_cresce_ganha_colunas(servidor):
+    perguntas = [(f"Q{i}", 0.05) for i in range(1, 12)]
+    with planilhas.usar_cliente_sheets(servidor.cliente()):
+        _salvar()
+        planilhas.salvar_resposta_ponderada(
+            "Comercial", "b@x", "3PL", "F", {q: 2 for q, _ in perguntas}, perguntas
+        )
+    cabecalho = servidor.planilhas[RESPOSTAS_ID]["Comercial"][0]
+    assert len(cabecalho) > 26
+    assert servidor.colunas[(RESPOSTAS_ID, "Comercial")] == len(cabecalho)
@@ -0,0 +1,130 @@
+"""ClienteSheetsAsync contra o stand-in local da API do Sheets (servidor_sheets.py)."""
+import threading
+
+import pytest
+from gspread.exceptions import APIError
+
+from planilhas_async import ClienteSheetsAsync, executar
+from servidor_sheets import ServidorSheets
+
+SHEET_ID = "planilha-teste"
+
+@pytest.fixture
+def servidor():
+    abas = {
+        "Lenta": [["E-mail", "Nota"], ["a@x", "1"]],
+        "Rapida": [["E-mail", "Nota"], ["b@x", "2"], ["c@x", "3"]],
+    }
+    with ServidorSheets({SHEET_ID: abas}) as s:
+        yield s
+
+def _cliente(servidor, max_simultaneas=8):
+    return ClienteSheetsAsync(None, max_simultaneas, cliente=servidor.cliente())
+
+def test_resultados_na_ordem_das_corrotinas(servidor):
+    servidor.atrasos["Lenta"] = 0.2
+    sheets = _cliente(servidor)
+    lenta, rapida = executar(
+        sheets.ler_aba(SHEET_ID, "Lenta"), sheets.ler_aba(SHEET_ID, "Rapida")
+    )
+    assert lenta == [["E-mail", "Nota"], ["a@x", "1"]]
+    assert rapida[1:] == [["b@x", "2"], ["c@x", "3"]]
+
+def test_ler_abas_em_uma_chamada_na_ordem_pedida(servidor):
+    sheets = _cliente(servidor)
+    valores = executar(sheets.ler_abas(SHEET_ID, ["Rapida", "Inexistente", "Lenta"]))[0]
+    assert list(valores) == ["Rapida", "Inexistente", "Lenta"]
+    assert valores["Inexistente"] is None
+    assert valores["Lenta"][1] == ["a@x", "1"]
+    assert servidor.contar("_batch_get") == 1
+
+def test_lista_de_abas_reaproveitada_entre_leituras(servidor):
+    sheets = _cliente(servidor)
+    for _ in range(3):
+        executar(sheets.ler_abas(SHEET_ID, ["Lenta", "Rapida"]))
+    # open_by_key + uma única listagem das abas
+    assert servidor.contar("_metadados") == 2
+    assert servidor.contar("_batch_get") == 3
+
+def test_aba_removida_depois_da_listagem_vira_vazia(servidor):
+    sheets = _cliente(servidor)
+    executar(sheets.ler_abas(SHEET_ID, ["Lenta", "Rapida"]))
+    del servidor.planilhas[SHEET_ID]["Rapida"]
+    valores = executar(sheets.ler_abas(SHEET_ID, ["Lenta", "Rapida"]))[0]
+    assert valores["Rapida"] is None
+    assert valores["Lenta"][1] == ["a@x", "1"]
+
+def test_limite_de_chamadas_vale_para_o_processo_inteiro(servidor):
+    servidor.atrasos["Lenta"] = 0.05
+    sheets = _cliente(servidor, max_simultaneas=2)
+    executar(sheets.titulos_abas(SHEET_ID))
+
+    def sessao():
+        # Cada sessão do Streamlit chama executar() com o seu próprio event loop
+        executar(*[sheets.ler_aba(SHEET_ID, "Lenta") for _ in range(4)])
+
+    threads = [threading.Thread(target=sessao) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert servidor.contar("_batch_get") == 16
+    assert servidor.pico_em_andamento == 2
+
+def test_anexos_concorrentes_nao_se_sobrescrevem(servidor):
+    sheets = _cliente(servidor, max_simultaneas=4)
+    executar(
+        *[sheets.anexar_linhas(SHEET_ID, "Rapida", [[f"n{i}@x", i]]) for i in range(20)]
+    )
+    linhas = servidor.planilhas[SHEET_ID]["Rapida"]
+    assert len(linhas) == 3 + 20
+    assert sorted(l[0] for l in linhas[3:]) == sorted(f"n{i}@x" for i in range(20))
+
+def test_atualizar_intervalos_grava_no_lugar(servidor):
+    sheets = _cliente(servidor)
+    executar(
+        sheets.atualizar_intervalos(
+            SHEET_ID, "Rapida",
+            [{"range": "A2:B2", "values": [["b@x", 2.5]]}, {"range": "B3", "values": [[1]]}],
+        )
+    )
+    assert servidor.planilhas[SHEET_ID]["Rapida"][1:] == [["b@x", "2.5"], ["c@x", "1"]]
+
+def test_erro_da_api_chega_a_quem_chamou(servidor):
+    sheets = _cliente(servidor)
+    executar(sheets.titulos_abas(SHEET_ID))
+    servidor.falhas.append(429)
+    with pytest.raises(APIError) as erro:
+        executar(sheets.ler_aba(SHEET_ID, "Lenta"))
+    assert erro.value.code == 429
+    # Sem chamada presa no limite: a próxima leitura funciona
+    assert executar(sheets.ler_aba(SHEET_ID, "Lenta"))[0][1] == ["a@x", "1"]
+
+def test_erro_numa_corrotina_nao_corrompe_as_demais(servidor):
+    sheets = _cliente(servidor, max_simultaneas=1)
+    executar(sheets.titulos_abas(SHEET_ID))
+    servidor.falhas.append(500)
+    with pytest.raises(APIError):
+        executar(
+            sheets.anexar_linhas(SHEET_ID, "Lenta", [["x@x", 1]]),
+            sheets.anexar_linhas(SHEET_ID, "Lenta", [["y@x", 2]]),
+        )
+    executar(sheets.anexar_linhas(SHEET_ID, "Lenta", [["z@x", 3]]))
+    assert [l[0] for l in servidor.planilhas[SHEET_ID]["Lenta"]][-1] == "z@x"
+
+def test_uma_listagem_de_abas_para_sessoes_simultaneas(servidor):
+    sheets = _cliente(servidor)
+    sheets.planilha(SHEET_ID)
+    servidor.atrasos["Lenta"] = 0.05
+
+    def sessao():
+        executar(sheets.ler_abas(SHEET_ID, ["Lenta"]))
+
+    threads = [threading.Thread(target=sessao) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # open_by_key + uma única listagem das abas
+    assert servidor.contar("_metadados") == 2
+    assert servidor.contar("_batch_get") == 8
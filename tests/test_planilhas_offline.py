@@ -0,0 +1,48 @@
+"""Cache pickle das pastas XLSX do modo offline (carregar_pasta)."""
+import pickle
+
+import openpyxl
+import pytest
+
+import planilhas_offline
+from planilhas_offline import carregar_pasta
+
+@pytest.fixture
+def pasta(tmp_path):
+    caminho = tmp_path / "Pasta.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.title = "Aba"
+    wb.active.append(["E-mail", "Nota"])
+    wb.active.append(["a@x", 3])
+    wb.save(caminho)
+    return caminho
+
+def _arquivo_cache(tmp_path):
+    return tmp_path / "cache" / "Pasta.xlsx.pkl"
+
+def test_cache_reaproveitado_sem_reler_a_pasta(pasta, tmp_path, monkeypatch):
+    abas = carregar_pasta(pasta, tmp_path / "cache")
+    assert abas["Aba"] == [["E-mail", "Nota"], ["a@x", "3"]]
+    monkeypatch.setattr(planilhas_offline, "ler_pasta_xlsx", pytest.fail)
+    assert carregar_pasta(pasta, tmp_path / "cache") == abas
+
+@pytest.mark.parametrize(
+    "conteudo",
+    [
+        {"abas": {"Aba": []}},  # formato antigo, sem as demais chaves
+        {"versao": planilhas_offline.VERSAO_CACHE - 1, "mtime_ns": 0},
+        ["não", "é", "um", "dicionário"],
+    ],
+)
+def test_cache_de_outro_formato_relê_a_pasta(pasta, tmp_path, conteudo):
+    _arquivo_cache(tmp_path).parent.mkdir()
+    _arquivo_cache(tmp_path).write_bytes(pickle.dumps(conteudo))
+    abas = carregar_pasta(pasta, tmp_path / "cache")
+    assert abas["Aba"][1] == ["a@x", "3"]
+    salvo = pickle.loads(_arquivo_cache(tmp_path).read_bytes())
+    assert salvo["versao"] == planilhas_offline.VERSAO_CACHE
+
+def test_cache_truncado_relê_a_pasta(pasta, tmp_path):
+    carregar_pasta(pasta, tmp_path / "cache")
+    _arquivo_cache(tmp_path).write_bytes(_arquivo_cache(tmp_path).read_bytes()[:10])
+    assert carregar_pasta(pasta, tmp_path / "cache")["Aba"][1] == ["a@x", "3"]